@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark of the verification flow
+
+Drives simulated users through register -> /callback -> NOTIFY -> listen_db -> update_roles.
+The bot side is the real Galtinn cog running against a stubbed Discord, while the verification server and
+Galtinn (use fake_galtinn) have to be running already. See README.md in this folder
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import secrets
+import statistics
+import sys
+import time
+import urllib.parse
+
+import aiohttp
+import asyncpg
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot", "src"))
+
+from cogs.galtinn import Galtinn  # noqa: E402
+
+# Far away from the ids fake_galtinn hands out, so simulated users never collide with seeded profiles
+DISCORD_ID_OFFSET = 700000000000000000
+
+STAGES = ("register", "callback", "user_fetch", "role_lookup", "role_update")
+
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+    def __repr__(self):
+        return f"<FakeRole id={self.id}>"
+
+
+class FakeMember:
+    """Stands in for discord.Member. Role changes sleep for the configured Discord latency"""
+
+    def __init__(self, member_id: int, discord_latency: float):
+        self.id = member_id
+        self.discord_latency = discord_latency
+
+    async def add_roles(self, *roles, reason: str | None = None):
+        await asyncio.sleep(self.discord_latency)
+
+    async def remove_roles(self, *roles, reason: str | None = None):
+        await asyncio.sleep(self.discord_latency)
+
+
+class FakeGuild:
+    """Stands in for discord.Guild. Lookups behave like discord.py's cache, keyed by int ids"""
+
+    def __init__(self, guild_id: int, discord_latency: float):
+        self.id = guild_id
+        self.discord_latency = discord_latency
+        self.members: dict[int, FakeMember] = {}
+        self.member_fetches = 0
+
+    def add_member(self, member_id: int):
+        self.members[member_id] = FakeMember(member_id, self.discord_latency)
+
+    def get_member(self, member_id: int) -> FakeMember | None:
+        return self.members.get(member_id)
+
+    async def fetch_member(self, member_id: int | str) -> FakeMember:
+        # Cache misses cost a round trip to Discord, just like in production
+        self.member_fetches += 1
+        await asyncio.sleep(self.discord_latency)
+        return self.members[int(member_id)]
+
+    def get_role(self, role_id: int) -> FakeRole:
+        return FakeRole(role_id)
+
+
+class FakeBot:
+    """The parts of the bot the Galtinn cog touches"""
+
+    def __init__(self, db: asyncpg.Pool, galtinn_url: str, guild: FakeGuild):
+        self.db = db
+        self.logger = logging.getLogger("benchmark")
+        self.galtinn = {
+            "api_url": galtinn_url,
+            "client_id": "benchmark",
+            "redirect_uri": "",
+            "auth_token": os.environ.get("GALTINN_AUTH_TOKEN") or "benchmark",
+        }
+        self.galtinn_roles = {"member": 1, "volunteer": 2}
+        self.guild_id = guild.id
+        self.guild = guild
+        self.cog = None
+
+    def get_guild(self, guild_id: int) -> FakeGuild | None:
+        return self.guild if guild_id == self.guild.id else None
+
+    def get_cog(self, name: str):
+        return self.cog
+
+    async def wait_until_ready(self):
+        # Keeps the cog's background loops from ever running during the benchmark
+        await asyncio.Event().wait()
+
+
+class Timeline:
+    """Timestamps of one simulated user going through the flow"""
+
+    def __init__(self):
+        self.register_start = None
+        self.registered = None
+        self.callback_start = None
+        self.callback_end = None
+        self.listener_start = None
+        self.user_fetched = None
+        self.roles_looked_up = None
+        self.roles_applied = None
+        self.done = asyncio.Event()
+
+    def stages(self) -> dict[str, float]:
+        return {
+            "register": self.registered - self.register_start,
+            "callback": self.callback_end - self.callback_start,
+            "user_fetch": self.user_fetched - self.listener_start,
+            "role_lookup": self.roles_looked_up - self.user_fetched,
+            "role_update": self.roles_applied - self.roles_looked_up,
+        }
+
+    def end_to_end(self) -> float:
+        return self.roles_applied - self.callback_start
+
+
+def instrument(cog: Galtinn, timelines: dict[int, Timeline]):
+    """
+    Wraps the cog's methods so every stage of the listener gets timestamped
+    """
+
+    fetch_galtinn_users = cog.fetch_galtinn_users
+    get_user_galtinn_roles = cog.get_user_galtinn_roles
+    update_roles = cog.update_roles
+
+    async def timed_fetch_galtinn_users(galtinn_user_id=None, discord_id=None, page=1):
+        timeline = timelines.get(discord_id)
+        if timeline:
+            timeline.listener_start = time.perf_counter()
+        result = await fetch_galtinn_users(galtinn_user_id=galtinn_user_id, discord_id=discord_id, page=page)
+        if timeline:
+            timeline.user_fetched = time.perf_counter()
+        return result
+
+    async def timed_get_user_galtinn_roles(galtinn_user):
+        result = await get_user_galtinn_roles(galtinn_user)
+        if timeline := timelines.get(galtinn_user.discord_profile.discord_id):
+            timeline.roles_looked_up = time.perf_counter()
+        return result
+
+    async def timed_update_roles(user, roles_to_add, roles_to_remove):
+        result = await update_roles(user, roles_to_add, roles_to_remove)
+        if timeline := timelines.get(user.id):
+            timeline.roles_applied = time.perf_counter()
+            timeline.done.set()
+        return result
+
+    cog.fetch_galtinn_users = timed_fetch_galtinn_users
+    cog.get_user_galtinn_roles = timed_get_user_galtinn_roles
+    cog.update_roles = timed_update_roles
+
+
+async def simulate_user(
+    discord_id: int,
+    timeline: Timeline,
+    db: asyncpg.Pool,
+    session: aiohttp.ClientSession,
+    args: argparse.Namespace,
+):
+    """
+    Runs one user through the flow the same way the register command and a browser would
+    """
+
+    challenge = secrets.token_urlsafe(32)
+    state = secrets.token_urlsafe(32)
+
+    # What /galtinn registrer does
+    timeline.register_start = time.perf_counter()
+    await db.execute("INSERT INTO galtinn_verification VALUES ($1, $2, $3);", discord_id, challenge, state)
+    timeline.registered = time.perf_counter()
+
+    # The user logs in at Galtinn, which is not part of what we measure
+    params = {
+        "client_id": "benchmark",
+        "scope": "openid profile email",
+        "response_type": "code",
+        "redirect_uri": f"{args.server_url}/callback",
+        "code_challenge": challenge,
+        "state": state,
+    }
+    authorize_url = f"{args.galtinn_url}/oauth/authorize/?{urllib.parse.urlencode(params)}"
+    async with session.get(authorize_url, allow_redirects=False) as r:
+        callback_url = r.headers["Location"]
+
+    timeline.callback_start = time.perf_counter()
+    async with session.get(callback_url, allow_redirects=False) as r:
+        await r.read()
+        if r.status != 303:
+            raise RuntimeError(f"Callback failed with status {r.status}")
+    timeline.callback_end = time.perf_counter()
+
+    await asyncio.wait_for(timeline.done.wait(), timeout=args.timeout)
+
+
+def percentiles(values: list[float]) -> tuple[float, float, float]:
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+    return quantiles[49], quantiles[94], quantiles[98]
+
+
+async def main(args: argparse.Namespace):
+    credentials = {
+        "host": os.environ["DATABASE_HOST"],
+        "database": os.environ["DATABASE_NAME"],
+        "user": os.environ["DATABASE_USER"],
+        "password": os.environ["DATABASE_PASSWORD"],
+    }
+    db = await asyncpg.create_pool(**credentials, min_size=2, max_size=args.concurrency + 2)
+
+    guild = FakeGuild(1, args.discord_latency)
+    # Fresh ids every run, since Galtinn remembers the profiles created by earlier runs
+    run_offset = DISCORD_ID_OFFSET + secrets.randbelow(10**12) * 10**6
+    discord_ids = [run_offset + i for i in range(args.users)]
+    for discord_id in discord_ids:
+        guild.add_member(discord_id)
+
+    bot = FakeBot(db, args.galtinn_url, guild)
+    cog = Galtinn(bot)
+    bot.cog = cog
+    cog.membership_check.cancel()
+    cog.verification_cleanup.cancel()
+    await cog.init_db()
+    await db.execute("DELETE FROM galtinn_verification WHERE discord_id >= $1;", DISCORD_ID_OFFSET)
+
+    timelines = {discord_id: Timeline() for discord_id in discord_ids}
+    instrument(cog, timelines)
+
+    # Give listen_db a moment to start listening
+    await asyncio.sleep(0.5)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = []
+
+    async def run(discord_id: int):
+        async with semaphore:
+            try:
+                await simulate_user(discord_id, timelines[discord_id], db, session, args)
+            except Exception as e:
+                failures.append(e)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[run(discord_id) for discord_id in discord_ids])
+        elapsed = time.perf_counter() - start
+
+    completed = [timeline for timeline in timelines.values() if timeline.done.is_set()]
+
+    print(f"Users:       {args.users} ({args.concurrency} concurrent)")
+    print(f"Completed:   {len(completed)}")
+    print(f"Failed:      {len(failures)}")
+    if failures:
+        print(f"             first failure: {failures[0]!r}")
+    print(f"Wall time:   {elapsed:.2f} s")
+    print(f"Throughput:  {len(completed) / elapsed:.1f} verifications/s")
+    print(f"Member fetches from Discord: {guild.member_fetches}")
+
+    if len(completed) >= 2:
+        print()
+        print(f"{'stage':<14}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+        for stage in STAGES:
+            p50, p95, p99 = percentiles([timeline.stages()[stage] for timeline in completed])
+            print(f"{stage:<14}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+        p50, p95, p99 = percentiles([timeline.end_to_end() for timeline in completed])
+        print(f"{'end to end':<14}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+        print("\nEnd to end is measured from the callback request to the roles being applied")
+
+    bot.cog = None  # Stops listen_db
+    await asyncio.sleep(1.5)
+    db.terminate()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the Galtinn verification flow")
+    parser.add_argument("--users", type=int, default=200, help="Number of simulated users")
+    parser.add_argument("--concurrency", type=int, default=20, help="Users going through the flow at the same time")
+    parser.add_argument("--server-url", default="http://127.0.0.1:8001", help="URL of the verification server")
+    parser.add_argument("--galtinn-url", default="http://127.0.0.1:8002", help="URL of the (fake) Galtinn API")
+    parser.add_argument(
+        "--discord-latency", type=float, default=0.05, help="Seconds each simulated Discord API call takes"
+    )
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for a user's roles to be applied")
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
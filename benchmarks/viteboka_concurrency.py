@@ -0,0 +1,174 @@
+"""
+Check that the bot keeps serving other interactions while Viteboka requests are in flight
+
+Runs article fetches through the Viteboka cog's client against a slow local stand-in for the wiki, while simulated
+commands arrive at a steady rate on the same event loop. Fails if the commands are held up, or if more requests than
+the client's cap reach the wiki at once. See README.md in this folder
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot", "src"))
+
+from cogs.viteboka import TextProcessor  # noqa: E402
+from cogs.viteboka import VitebokaAPI  # noqa: E402
+from cogs.viteboka import fetch_article  # noqa: E402
+
+ARTICLE = "'''Chateau Neuf''' er studenthuset i [[Oslo]], og huser blant annet [[Storsalen]] og [[Glassbaren]]."
+
+
+class SlowWiki:
+    """Answers parse requests after a delay, from its own thread and event loop, like a wiki on another machine"""
+
+    def __init__(self, latency: float):
+        """
+        Parameters
+        ----------
+        latency (float): Seconds every request takes
+        """
+
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.page_ids = {}
+        self.url = None
+        self.started = threading.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        # The article only has a lead section, so fetch_article's request for section 1 gets MediaWiki's error
+        if request.query.get("section", "0") != "0":
+            return web.json_response({"error": {"code": "nosuchsection", "info": "There is no section 1."}})
+
+        title = request.query["page"]
+        page_id = self.page_ids.setdefault(title, len(self.page_ids) + 1)
+        return web.json_response(
+            {"parse": {"title": title, "pageid": page_id, "revid": page_id, "wikitext": {"*": ARTICLE}, "images": []}}
+        )
+
+    def run(self):
+        async def serve():
+            app = web.Application()
+            app.router.add_get("/api.php", self.handle)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            self.url = f"http://127.0.0.1:{runner.addresses[0][1]}/api.php"
+            self.started.set()
+            await asyncio.Event().wait()
+
+        threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+        self.started.wait()
+
+
+class BlockingAPI:
+    """What the cog did before it got an async client. Only here to show that the check catches it"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def get(self, params: dict) -> dict:
+        with urllib.request.urlopen(f"{self.url}?{urllib.parse.urlencode(params)}") as response:
+            return json.loads(response.read())
+
+
+async def simulate_commands(interval: float, stop: asyncio.Event) -> list[float]:
+    """
+    Simulates commands arriving every interval seconds. Returns how long each one waited for the event loop
+    """
+
+    latencies = []
+    next_arrival = time.perf_counter()
+    while not stop.is_set():
+        next_arrival += interval
+        await asyncio.sleep(max(next_arrival - time.perf_counter(), 0))
+        # A command that does no I/O of its own, so all of its latency is waiting for the loop
+        await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - next_arrival)
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> int:
+    wiki = SlowWiki(args.wiki_latency)
+    wiki.run()
+
+    if args.blocking:
+        api = BlockingAPI(wiki.url)
+    else:
+        api = VitebokaAPI(max_concurrent_requests=args.max_concurrent_requests, url=wiki.url)
+        await api.start()
+    processor = TextProcessor()
+
+    stop = asyncio.Event()
+    commands = asyncio.create_task(simulate_commands(args.command_interval, stop))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[fetch_article(api, f"Artikkel {i}", processor=processor) for i in range(args.fetches)],
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    latencies = await commands
+    if not args.blocking:
+        await api.close()
+    processor.close()
+
+    failed = [result for result in results if isinstance(result, BaseException)]
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+
+    print(f"Article fetches:   {args.fetches} ({len(failed)} failed)")
+    print(f"Wiki latency:      {args.wiki_latency * 1000:.0f} ms per request, {wiki.requests} requests")
+    print(f"Wiki concurrency:  {wiki.max_in_flight} at most (cap {args.max_concurrent_requests})")
+    print(f"Wall time:         {elapsed:.2f} s")
+    print()
+    print(f"Commands served while fetching: {len(latencies)}")
+    print(f"Command latency:   p50 {quantiles[49] * 1000:.1f} ms, p99 {quantiles[98] * 1000:.1f} ms")
+    print(f"                   max {max(latencies) * 1000:.1f} ms (limit {args.max_command_latency * 1000:.0f} ms)")
+
+    problems = []
+    if failed:
+        problems.append(f"{len(failed)} fetches failed, first: {failed[0]!r}")
+    if max(latencies) > args.max_command_latency:
+        problems.append("commands were held up while articles were fetched")
+    if not args.blocking and wiki.max_in_flight > args.max_concurrent_requests:
+        problems.append("more requests than the cap reached the wiki at once")
+
+    print()
+    print("\n".join(f"FAIL  {problem}" for problem in problems) or "ok")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that Viteboka requests don't hold up other interactions")
+    parser.add_argument("--fetches", type=int, default=16, help="Number of articles fetched at the same time")
+    parser.add_argument("--wiki-latency", type=float, default=0.5, help="Seconds every request to the wiki takes")
+    parser.add_argument("--max-concurrent-requests", type=int, default=4, help="Cap of the cog's client")
+    parser.add_argument("--command-interval", type=float, default=0.01, help="Seconds between simulated commands")
+    parser.add_argument(
+        "--max-command-latency", type=float, default=0.1, help="Seconds a command may wait before the check fails"
+    )
+    parser.add_argument("--blocking", action="store_true", help="Fetch with blocking calls, which should fail")
+
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,96 @@
+"""
+Compares the Viteboka wikitext converter against pandoc
+
+Checks that the converter keeps the same visible text as pandoc on every fixture in fixtures/wikitext, and times
+both. Needs pypandoc and pandoc, which the bot itself no longer does. See README.md in this folder
+"""
+
+import argparse
+import difflib
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+
+import pypandoc
+import regex
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot", "src"))
+
+from cogs.utils import wikitext  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "wikitext")
+
+
+def pandoc_path(text: str) -> str:
+    """The conversion fetch_article did before it had its own converter"""
+
+    text = pypandoc.convert_text(text, "markdown", format="mediawiki")
+    text = regex.sub(r"\[(.+?)\]\(.+? \"wikilink\"\)", r"\1", text, flags=regex.MULTILINE | regex.DOTALL)
+    text = regex.sub(r"\{.+\}", "", text)
+    return text.strip("\n")
+
+
+def visible_text(markdown: str) -> str:
+    """
+    Reduces markdown to the words a reader would see, so the two outputs can be compared.
+    Link targets, list markers, emphasis and line wrapping are thrown away, as are the footnotes, rules and raw
+    <references /> pandoc emits, since the converter drops those on purpose
+    """
+
+    markdown = re.sub(r"^\[\^\d+\]:.*?(?=^\S|\Z)", "", markdown, flags=re.MULTILINE | re.DOTALL)  # Footnotes
+    markdown = re.sub(r"\[\^\d+\]|<references\s*/>|^-{3,}$", "", markdown, flags=re.MULTILINE)
+    markdown = re.sub(r"\\$", "", markdown, flags=re.MULTILINE)  # Hard line breaks
+    markdown = re.sub(r"\[([^\]]*)\]\([^)]*\)(\{[^}]*\})?", r"\1", markdown)  # [label](target){.wikilink}
+    markdown = re.sub(r"<((?:https?:)?//[^>]+)>", r"\1", markdown)
+    markdown = re.sub(r"^\s*(?:[-*+]|\d+\.|:)\s+", "", markdown, flags=re.MULTILINE)
+    markdown = re.sub(r"^#+\s*", "", markdown, flags=re.MULTILINE)
+    markdown = re.sub(r"\\(.)", r"\1", markdown.replace("*", "").replace("_", ""))
+    return " ".join(markdown.split())
+
+
+def time_conversion(convert: callable, texts: list[str], rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in texts:
+            convert(text)
+        timings.append((time.perf_counter() - start) / len(texts))
+    return timings
+
+
+def main(args: argparse.Namespace) -> int:
+    paths = sorted(glob.glob(os.path.join(FIXTURES, "*.wiki")))
+    texts = {os.path.basename(path): wikitext.strip_templates(open(path, encoding="utf-8").read()) for path in paths}
+
+    mismatches = 0
+    for name, text in texts.items():
+        expected = visible_text(pandoc_path(text))
+        actual = visible_text(wikitext.to_discord_markdown(text))
+        if expected == actual:
+            print(f"ok        {name}")
+            continue
+
+        mismatches += 1
+        print(f"MISMATCH  {name}")
+        diff = difflib.unified_diff(expected.split(), actual.split(), "pandoc", "wikitext", lineterm="", n=3)
+        print("\n".join(f"          {line}" for line in diff))
+
+    print()
+    print(f"{'converter':<12}{'mean (ms)':>12}{'stdev (ms)':>12}")
+    for label, convert in (("pandoc", pandoc_path), ("wikitext", wikitext.to_discord_markdown)):
+        timings = time_conversion(convert, list(texts.values()), args.rounds)
+        mean, stdev = statistics.mean(timings), statistics.stdev(timings) if len(timings) > 1 else 0
+        print(f"{label:<12}{mean * 1000:>12.3f}{stdev * 1000:>12.3f}")
+    print(f"\nPer article, averaged over {len(texts)} fixtures and {args.rounds} rounds")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Viteboka wikitext converter against pandoc")
+    parser.add_argument("--rounds", type=int, default=20, help="Number of times every fixture is converted")
+
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,232 @@
+"""
+Benchmark and regression check of the Viteboka text pipeline
+
+Times every stage of turning wikitext into embed text on the fixtures in fixtures/wikitext, checks that the stages
+grow linearly with the size of the input, and compares the embed text with the golden output in
+fixtures/wikitext/golden. Run with --update-golden after an intended change to the output. See README.md in this folder
+"""
+
+import argparse
+import asyncio
+import glob
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot", "src"))
+
+from cogs.utils import wikitext  # noqa: E402
+from cogs.viteboka import ARTICLE_LENGTH  # noqa: E402
+from cogs.viteboka import TextProcessor  # noqa: E402
+from cogs.viteboka import fetch_article  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "wikitext")
+GOLDEN = os.path.join(FIXTURES, "golden")
+
+# Fixtures made to be hard on the pipeline, rather than looking like ordinary articles
+PATHOLOGICAL = ("deep_nesting", "unclosed_template")
+
+# Growth exponents, measured between the fixture and the fixture repeated GROWTH_FACTOR times.
+# 1 is linear, 2 quadratic. Anything steeper is catastrophic backtracking
+GROWTH_FACTOR = 4
+GROWTH_WARNING = 1.5
+GROWTH_FAILURE = 2.5
+
+STAGES = {
+    "templates": lambda text: wikitext.strip_templates(text),
+    "convert": lambda text: wikitext.to_discord_markdown(text, ARTICLE_LENGTH),
+    "fallback": lambda text: wikitext.plain_text(text, ARTICLE_LENGTH),
+}
+
+
+def load_fixtures() -> dict[str, str]:
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.wiki"))):
+        with open(path, encoding="utf-8") as file:
+            fixtures[os.path.basename(path)[:-5]] = file.read()
+
+    # A huge article, made from the ordinary ones, so the early exit of the conversion gets exercised
+    fixtures["huge"] = "\n\n".join(text for name, text in fixtures.items() if name not in PATHOLOGICAL) * 40
+    return fixtures
+
+
+def section(text: str, number: int) -> str | None:
+    """
+    Cuts a section out of an article the way MediaWiki's parse API does with the section parameter. Section 0 is the
+    lead, and every other section runs until the next heading of the same or a higher level
+
+    Returns
+    ----------
+    (str | None): The section. None if the article has no such section
+    """
+
+    lines = text.split("\n")
+    headings = [(i, len(match.group(1))) for i, line in enumerate(lines) if (match := wikitext.HEADING.match(line))]
+    if number == 0:
+        return "\n".join(lines[: headings[0][0]] if headings else lines)
+    if number > len(headings):
+        return None
+
+    start, level = headings[number - 1]
+    end = next((i for i, heading_level in headings[number:] if heading_level <= level), len(lines))
+    return "\n".join(lines[start:end])
+
+
+class FixtureAPI:
+    """Stands in for VitebokaAPI. Answers fetch_article's parse requests with the sections of the fixtures"""
+
+    def __init__(self, fixtures: dict[str, str]):
+        """
+        Parameters
+        ----------
+        fixtures (dict[str, str]): Wikitext of the articles by title
+        """
+
+        self.fixtures = fixtures
+        # Every article has a single revision, which shares the page id
+        self.titles = {page_id: title for page_id, title in enumerate(fixtures, start=1)}
+        self.page_ids = {title: page_id for page_id, title in self.titles.items()}
+
+    async def get(self, params: dict) -> dict:
+        if params.get("action") != "parse":
+            raise NotImplementedError(f"Only parse requests are served: {params}")
+
+        title = params["page"] if "page" in params else self.titles.get(params.get("pageid") or params.get("oldid"))
+        if title not in self.fixtures:
+            return {"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}
+        if (text := section(self.fixtures[title], params.get("section", 0))) is None:
+            return {"error": {"code": "nosuchsection", "info": f"There is no section {params['section']}."}}
+
+        page_id = self.page_ids[title]
+        return {"parse": {"title": title, "pageid": page_id, "revid": page_id, "wikitext": {"*": text}, "images": []}}
+
+
+async def embed_texts(fixtures: dict[str, str]) -> dict[str, str]:
+    """The text fetch_article puts in the embed for every fixture, converted in the same worker pool as in the bot"""
+
+    api = FixtureAPI(fixtures)
+    processor = TextProcessor()
+    try:
+        return {name: (await fetch_article(api, name, processor=processor))[2] for name in fixtures}
+    finally:
+        processor.close()
+
+
+def time_stage(stage: callable, text: str, rounds: int) -> float:
+    """Fastest of a number of rounds, which is the least noisy on a busy machine"""
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        stage(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def stage_inputs(text: str) -> dict[str, str]:
+    # Every stage gets the input it gets in fetch_article
+    stripped = wikitext.strip_templates(text)
+    return {"templates": text, "convert": stripped, "fallback": text}
+
+
+def check_golden(fixtures: dict[str, str], update: bool) -> int:
+    """
+    Compares the embed text of every fixture with its golden output. Golden output is only written when asked to,
+    so a missing file fails instead of quietly being made from whatever the pipeline produces now
+
+    Returns
+    ----------
+    (int): Number of mismatches and missing golden files
+    """
+
+    os.makedirs(GOLDEN, exist_ok=True)
+    mismatches = 0
+    for name, output in asyncio.run(embed_texts(fixtures)).items():
+        path = os.path.join(GOLDEN, f"{name}.md")
+
+        if update:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(output)
+            print(f"written   {name}")
+            continue
+
+        if not os.path.exists(path):
+            mismatches += 1
+            print(f"MISSING   {name}. Run with --update-golden to create it")
+            continue
+
+        with open(path, encoding="utf-8") as file:
+            expected = file.read()
+        if output == expected:
+            print(f"ok        {name}")
+        else:
+            mismatches += 1
+            differences = (i for i, (a, b) in enumerate(zip(output, expected)) if a != b)
+            position = next(differences, min(len(output), len(expected)))
+            print(f"MISMATCH  {name} at character {position}")
+            print(f"          expected: {expected[max(position - 30, 0) : position + 30]!r}")
+            print(f"          got:      {output[max(position - 30, 0) : position + 30]!r}")
+
+    return mismatches
+
+
+def benchmark(fixtures: dict[str, str], rounds: int) -> int:
+    """
+    Times every stage on every fixture and on the fixture grown GROWTH_FACTOR times
+
+    Returns
+    ----------
+    (int): Number of stages that grow catastrophically
+    """
+
+    print(f"{'fixture':<20}{'size':>8}" + "".join(f"{stage + ' (ms)':>18}" for stage in STAGES) + "   growth")
+
+    failures = 0
+    for name, text in fixtures.items():
+        inputs = stage_inputs(text)
+        grown_inputs = stage_inputs(text * GROWTH_FACTOR)
+
+        columns = []
+        notes = []
+        for stage, function in STAGES.items():
+            elapsed = time_stage(function, inputs[stage], rounds)
+            grown = time_stage(function, grown_inputs[stage], max(rounds // GROWTH_FACTOR, 1))
+            exponent = math.log(max(grown, 1e-7) / max(elapsed, 1e-7), GROWTH_FACTOR)
+            columns.append(f"{elapsed * 1000:>18.3f}")
+
+            # Tiny timings are mostly noise, so growth is only judged when there's something to measure
+            if grown < 0.001:
+                continue
+            if exponent > GROWTH_FAILURE:
+                failures += 1
+                notes.append(f"{stage} CATASTROPHIC (n^{exponent:.1f})")
+            elif exponent > GROWTH_WARNING:
+                notes.append(f"{stage} superlinear (n^{exponent:.1f})")
+
+        print(f"{name:<20}{len(text):>8}" + "".join(columns) + "   " + (", ".join(notes) or "linear"))
+
+    return failures
+
+
+def main(args: argparse.Namespace) -> int:
+    fixtures = load_fixtures()
+
+    mismatches = check_golden(fixtures, args.update_golden)
+    print()
+    failures = benchmark(fixtures, args.rounds)
+
+    sizes = [len(text) for text in fixtures.values()]
+    print(f"\nFastest of {args.rounds} rounds. Fixtures from {min(sizes)} to {max(sizes)} characters")
+    print(f"Growth is measured against the fixture repeated {GROWTH_FACTOR} times")
+    print(f"{mismatches} golden mismatches, {failures} catastrophic stages")
+
+    return 1 if mismatches or failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and regression check of the Viteboka text pipeline")
+    parser.add_argument("--rounds", type=int, default=20, help="Number of times every stage is timed")
+    parser.add_argument("--update-golden", action="store_true", help="Write the current output as the golden output")
+
+    sys.exit(main(parser.parse_args()))
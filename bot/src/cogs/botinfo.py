@@ -37,31 +37,8 @@ class BotInfo(commands.Cog):
         process = Process(getpid())
         memory_usage = round(process.memory_info().rss / 1000000, 1)
 
-        # Member stats
-        #
-        # This is a pretty stupid way of doing things but it's the best I can come up with.
-        # Using curly brackets for both dicts and sets is retarded becuase
-        # I have to do this shit in order to create a fucking empty set.
-        #
-        # Apparently you can't access user presences, only member presences
-        # Because of that I have to use sets instead of ints in order to not count duplicate users.
-        # Fucking hell discord...
-        total_members = set([])
-        online_members = set([])
-        idle_members = set([])
-        dnd_members = set([])
-        offline_members = set([])
-        for guild in self.bot.guilds:
-            for member in guild.members:
-                total_members.add(member.id)
-                if str(member.status) == "online":
-                    online_members.add(member.id)
-                elif str(member.status) == "idle":
-                    idle_members.add(member.id)
-                elif str(member.status) == "dnd":
-                    dnd_members.add(member.id)
-                elif str(member.status) == "offline":
-                    offline_members.add(member.id)
+        # Member stats. Kept up to date by the Members cog, which also deals with users being in several guilds
+        total_members, presences = self.bot.get_cog("Members").global_presence_counts()
 
         # Build embed
         embed = discord.Embed(color=interaction.client.user.color, url=environ["BOT_MISC_WEBSITE"])
@@ -77,11 +54,11 @@ class BotInfo(commands.Cog):
         if "docker" in environ:
             embed.add_field(name="Docker", value="U+FE0F")
         embed.add_field(
-            name=f"Brukere ({len(total_members)})",
-            value=f'{self.bot.emoji["online"]}{len(online_members)}\n'
-            + f'{self.bot.emoji["idle"]}{len(idle_members)}\n'
-            + f'{self.bot.emoji["dnd"]}{len(dnd_members)}\n'
-            + f'{self.bot.emoji["offline"]}{len(offline_members)}',
+            name=f"Brukere ({total_members})",
+            value=f'{self.bot.emoji["online"]}{presences["online"]}\n'
+            + f'{self.bot.emoji["idle"]}{presences["idle"]}\n'
+            + f'{self.bot.emoji["dnd"]}{presences["dnd"]}\n'
+            + f'{self.bot.emoji["offline"]}{presences["offline"]}',
         )
         embed.add_field(
             name="Lenker",
@@ -5,6 +5,37 @@ from cogs.utils import misc_utils
 from discord import app_commands
 from discord.ext import commands
 
+# Translations of guild features shown in the guild info
+GUILD_FEATURES = {
+    "ANIMATED_BANNER": "Animer serverbanner",
+    "ANIMATED_ICON": "Animert serverikon",
+    "APPLICATION_COMMAND_PERMISSIONS_V2": "Gamle slash command tillatelser",
+    "AUTO_MODERATION": "Automoderering",
+    "BANNER": "Serverbanner",
+    "COMMUNITY": "Samfunnsserver",
+    "CREATOR_MONETIZABLE_PROVISIONAL": "Betalingsmuligheter",
+    "CREATOR_STORE_PAGE": "Abonnomentsside",
+    "DEVELOPER_SUPPORT_SERVER": "Støtteserver for utviklere",
+    "DISCOVERABLE": "På utforsksiden",
+    "FEATURABLE": "Fremhevbar",
+    "INVITES_DISABLED": "Invitasjoner deaktivert",
+    "INVITE_SPLASH": "Invitasjonsbilde",
+    "MEMBER_VERIFICATION_GATE_ENABLED": "Medlemsverifisering",
+    "MORE_STICKERS": "Flere stickers",
+    "NEWS": "Nyhetskanaler",
+    "PARTNERED": "Partner",
+    "PREVIEW_ENABLED": "Forhåndsvisning",
+    "RAID_ALERTS_DISABLED": "Raidvarsler deaktivert",
+    "ROLE_ICONS": "Rolleikon",
+    "ROLE_SUBSCRIPTIONS_AVAILABLE_FOR_PURCHASE": "Abonomentsroller tilgjengelig",
+    "ROLE_SUBSCRIPTIONS_ENABLED": "Abonomentsroller aktivert",
+    "TICKETED_EVENTS_ENABLED": "Arrangmenter med billettsalg",
+    "VANITY_URL": "Egendefinert URL",
+    "VERIFIED": "Verifisert",
+    "VIP_REGIONS": "Høyere bitrate i stemmekanaler",
+    "WELCOME_SCREEN_ENABLED": "Velkomstskjerm",
+}
+
 
 class Info(commands.Cog):
     """View information about Discord object such as guilds, users, roles and channels"""
@@ -18,6 +49,13 @@ class Info(commands.Cog):
 
         self.bot = bot
 
+        # Pages of these lists are made again from the key in the buttons, so scrolling survives restarts
+        discord_utils.register_scroller_source("topproller", self.top_roles_paginator)
+        discord_utils.register_scroller_source("eldst", self.oldest_members_paginator)
+
+        # guild id -> name -> rendered part of an embed that rarely changes. Cleared by the listeners below
+        self.rendered: dict[int, dict[str, str | dict]] = {}
+
     guild_group = app_commands.Group(name="guild", description="Se ting om serveren")
     user_group = app_commands.Group(name="bruker", description="Se ting om brukeren")
 
@@ -67,65 +105,43 @@ class Info(commands.Cog):
 
         return join_method(boosters)
 
-    def construct_member_string(self, members: list[discord.Member]) -> str:
+    def rendered_component(self, guild: discord.Guild, name: str, render: callable):
         """
-        Joins all names into a string
+        Returns a cached rendered component of the guild, rendering it first if it isn't cached
 
         Parameters
         ----------
-        members (list[discord.Member]): List of members
+        guild (discord.Guild): The guild
+        name (str): Name of the component
+        render (callable): Function that renders the component
 
         Returns
-        -------
-        (str): String of members
+        ----------
+        (str|dict): The component. Don't modify it
         """
 
-        if not members:
-            return "**Ingen**"
+        components = self.rendered.setdefault(guild.id, {})
+        if name not in components:
+            components[name] = render()
+        return components[name]
 
-        members = [member.name for member in members]
-
-        return ", ".join(members)
-
-    @app_commands.guild_only()
-    @app_commands.checks.bot_has_permissions(embed_links=True, external_emojis=True)
-    @app_commands.checks.cooldown(1, 2)
-    @guild_group.command(name="info", description="Hent informasjon om en server")
-    async def guild_info(self, interaction: discord.Interaction):
+    def render_guild_info(self, interaction: discord.Interaction) -> dict:
         """
-        Sends general information about the guild
+        Renders the parts of the guild info that only change when the guild, its roles or its boosts do
 
         Parameters
         ----------
         interaction (discord.Interaction): Slash command context object
-        """
 
-        # Days since guild was created
-        creation_date_timestamp = discord.utils.format_dt(interaction.guild.created_at, style="F")
-        since_created_days = (interaction.created_at - interaction.guild.created_at).days
-        days_ago = f"{since_created_days} dager" if since_created_days != 1 else f"{since_created_days} dag"
+        Returns
+        ----------
+        (dict): The rendered parts
+        """
 
-        # Member count and status counts
-        total_members = interaction.guild.member_count
-        bot_members = 0
-        online_members = 0
-        idle_members = 0
-        dnd_members = 0
-        offline_members = 0
-        for member in interaction.guild.members:
-            if member.bot:
-                bot_members += 1
-            if str(member.status) == "online":
-                online_members += 1
-            elif str(member.status) == "idle":
-                idle_members += 1
-            elif str(member.status) == "dnd":
-                dnd_members += 1
-            elif str(member.status) == "offline":
-                offline_members += 1
+        guild = interaction.guild
 
         # Roles
-        roles = self.construct_role_string(interaction.guild.roles)
+        roles = self.construct_role_string(guild.roles)
         roles = (
             roles
             if len(roles) < 1024
@@ -140,53 +156,20 @@ class Info(commands.Cog):
             else f"Bruk `/{self.bot.tree.get_command('guild').get_command('boosters').qualified_name}` for å se boostere"  # noqa: E501
         )
 
-        # Channels counts
-        text_channels = len(interaction.guild.text_channels)
-        voice_channels = len(interaction.guild.voice_channels)
-        categories = len(interaction.guild.categories)
-        total_channels = text_channels + voice_channels
-
         # Features
         features_string = ""
-        if interaction.guild.features != []:
-            features = {
-                "ANIMATED_BANNER": "Animer serverbanner",
-                "ANIMATED_ICON": "Animert serverikon",
-                "APPLICATION_COMMAND_PERMISSIONS_V2": "Gamle slash command tillatelser",
-                "AUTO_MODERATION": "Automoderering",
-                "BANNER": "Serverbanner",
-                "COMMUNITY": "Samfunnsserver",
-                "CREATOR_MONETIZABLE_PROVISIONAL": "Betalingsmuligheter",
-                "CREATOR_STORE_PAGE": "Abonnomentsside",
-                "DEVELOPER_SUPPORT_SERVER": "Støtteserver for utviklere",
-                "DISCOVERABLE": "På utforsksiden",
-                "FEATURABLE": "Fremhevbar",
-                "INVITES_DISABLED": "Invitasjoner deaktivert",
-                "INVITE_SPLASH": "Invitasjonsbilde",
-                "MEMBER_VERIFICATION_GATE_ENABLED": "Medlemsverifisering",
-                "MORE_STICKERS": "Flere stickers",
-                "NEWS": "Nyhetskanaler",
-                "PARTNERED": "Partner",
-                "PREVIEW_ENABLED": "Forhåndsvisning",
-                "RAID_ALERTS_DISABLED": "Raidvarsler deaktivert",
-                "ROLE_ICONS": "Rolleikon",
-                "ROLE_SUBSCRIPTIONS_AVAILABLE_FOR_PURCHASE": "Abonomentsroller tilgjengelig",
-                "ROLE_SUBSCRIPTIONS_ENABLED": "Abonomentsroller aktivert",
-                "TICKETED_EVENTS_ENABLED": "Arrangmenter med billettsalg",
-                "VANITY_URL": "Egendefinert URL",
-                "VERIFIED": "Verifisert",
-                "VIP_REGIONS": "Høyere bitrate i stemmekanaler",
-                "WELCOME_SCREEN_ENABLED": "Velkomstskjerm",
-            }
-            for feature in interaction.guild.features:
-                if translation := features.get(feature):
-                    features_string += f"* {translation}\n"
+        for feature in guild.features:
+            if translation := GUILD_FEATURES.get(feature):
+                features_string += f"* {translation}\n"
 
         photos = {}
-        if interaction.guild.splash:
-            photos["Invitasjonsbilde"] = interaction.guild.splash
-        if interaction.guild.banner:
-            photos["Banner"] = interaction.guild.banner
+        if guild.splash:
+            photos["Invitasjonsbilde"] = guild.splash
+        if guild.banner:
+            photos["Banner"] = guild.banner
+        photos_string = ""
+        for key, value in photos.items():
+            photos_string += f"* [{key}]({value})\n"
 
         verification_level = {
             "none": "ingen",
@@ -195,19 +178,103 @@ class Info(commands.Cog):
             "high": "e-post, registrert i 5 min, medlem i 10 min",
             "extreme": "telefon",
         }
-        verification = verification_level[str(interaction.guild.verification_level)]
+        verification = verification_level[str(guild.verification_level)]
 
         content_filter = {"disabled": "nei", "no_role": "for alle uten rolle", "all_members": "ja"}
-        content = content_filter[str(interaction.guild.explicit_content_filter)]
+        content = content_filter[str(guild.explicit_content_filter)]
 
-        embed = discord.Embed(
-            color=interaction.guild.me.color,
-            description=f"* **Verifiseringskrav:** {verification}\n"
+        description = (
+            f"* **Verifiseringskrav:** {verification}\n"
             + f"* **Innholdsfilter:** {content}\n"
-            + f"* **Boost Tier:** {interaction.guild.premium_tier}\n"
-            + f"* **Emoji:** {len(interaction.guild.emojis)}\n"
-            + f"* **Stickers:** {len(interaction.guild.stickers)}\n",
+            + f"* **Boost Tier:** {guild.premium_tier}\n"
+            + f"* **Emoji:** {len(guild.emojis)}\n"
+            + f"* **Stickers:** {len(guild.stickers)}\n"
         )
+
+        return {
+            "description": description,
+            "roles": roles,
+            "boosters": boosters,
+            "features": features_string,
+            "photos": photos_string,
+        }
+
+    def asset_embed(self, guild: discord.Guild, asset: discord.Asset) -> discord.Embed:
+        """
+        Creates an embed showing an image of the guild
+
+        Parameters
+        ----------
+        guild (discord.Guild): The guild
+        asset (discord.Asset): The image
+
+        Returns
+        ----------
+        (discord.Embed): The embed
+        """
+
+        embed = discord.Embed(color=guild.me.color, description=f"[Lenke]({asset})")
+        embed.set_author(name=guild.name, icon_url=guild.icon)
+        embed.set_image(url=asset)
+        return embed
+
+    def construct_member_string(self, members: list[discord.Member]) -> str:
+        """
+        Joins all names into a string
+
+        Parameters
+        ----------
+        members (list[discord.Member]): List of members
+
+        Returns
+        -------
+        (str): String of members
+        """
+
+        if not members:
+            return "**Ingen**"
+
+        members = [member.name for member in members]
+
+        return ", ".join(members)
+
+    @app_commands.guild_only()
+    @app_commands.checks.bot_has_permissions(embed_links=True, external_emojis=True)
+    @app_commands.checks.cooldown(1, 2)
+    @guild_group.command(name="info", description="Hent informasjon om en server")
+    async def guild_info(self, interaction: discord.Interaction):
+        """
+        Sends general information about the guild
+
+        Parameters
+        ----------
+        interaction (discord.Interaction): Slash command context object
+        """
+
+        # Days since guild was created
+        creation_date_timestamp = discord.utils.format_dt(interaction.guild.created_at, style="F")
+        since_created_days = (interaction.created_at - interaction.guild.created_at).days
+        days_ago = f"{since_created_days} dager" if since_created_days != 1 else f"{since_created_days} dag"
+
+        # Member count and status counts. Kept up to date by the Members cog
+        total_members = interaction.guild.member_count
+        presences = self.bot.get_cog("Members").guild_presence_counts(interaction.guild)
+        bot_members = presences["bot"]
+        online_members = presences["online"]
+        idle_members = presences["idle"]
+        dnd_members = presences["dnd"]
+        offline_members = presences["offline"]
+
+        # Channels counts
+        text_channels = len(interaction.guild.text_channels)
+        voice_channels = len(interaction.guild.voice_channels)
+        categories = len(interaction.guild.categories)
+        total_channels = text_channels + voice_channels
+
+        # Everything else only changes with the guild, its roles or its boosts
+        rendered = self.rendered_component(interaction.guild, "info", lambda: self.render_guild_info(interaction))
+
+        embed = discord.Embed(color=interaction.guild.me.color, description=rendered["description"])
         embed.set_author(name=interaction.guild.name, icon_url=interaction.guild.icon)
         embed.set_thumbnail(url=interaction.guild.icon)
         embed.add_field(name="ID", value=interaction.guild.id)
@@ -228,20 +295,19 @@ class Info(commands.Cog):
             + f'{self.bot.emoji["dnd"]}{dnd_members} '
             + f'{self.bot.emoji["offline"]}{offline_members}',
         )
-        embed.add_field(name=f"Roller ({len(interaction.guild.roles) - 1})", value=roles, inline=False)
+        embed.add_field(name=f"Roller ({len(interaction.guild.roles) - 1})", value=rendered["roles"], inline=False)
         if interaction.guild.premium_tier != 0:
             embed.add_field(
-                name=f"Boosts ({interaction.guild.premium_subscription_count})", value=boosters, inline=False
+                name=f"Boosts ({interaction.guild.premium_subscription_count})",
+                value=rendered["boosters"],
+                inline=False,
             )
 
-        if features_string:
-            embed.add_field(name="Tillegsfunksjoner", value=features_string)
+        if rendered["features"]:
+            embed.add_field(name="Tillegsfunksjoner", value=rendered["features"])
 
-        if photos:
-            photos_string = ""
-            for key, value in photos.items():
-                photos_string += f"* [{key}]({value})\n"
-            embed.add_field(name="Bilder", value=photos_string)
+        if rendered["photos"]:
+            embed.add_field(name="Bilder", value=rendered["photos"])
         await interaction.response.send_message(embed=embed)
 
     @app_commands.guild_only()
@@ -257,11 +323,13 @@ class Info(commands.Cog):
         interaction (discord.Interaction): Slash command context object
         """
 
-        roles = self.construct_role_string(interaction.guild.roles)
+        roles = self.rendered_component(
+            interaction.guild, "roles", lambda: self.construct_role_string(interaction.guild.roles)
+        )
 
         # IF roles list is longer than 2048, create text file and send it
         if len(roles) > 2048:
-            await discord_utils.send_as_txt_file(interaction, roles, f"./assets/temp/{interaction.guild.id}_roles.txt")
+            await discord_utils.send_as_txt_file(interaction, roles, f"{interaction.guild.id}_roles.txt")
         else:
             embed = discord.Embed(color=interaction.guild.me.color, description=roles)
             embed.set_author(name=f"Roller ({len(interaction.guild.roles)})", icon_url=interaction.guild.icon)
@@ -285,7 +353,9 @@ class Info(commands.Cog):
             embed = embed_templates.error_warning("Serveren har ikke noen boosts :(")
             return await interaction.response.send_message(embed=embed)
 
-        boosters = self.construct_booster_string(interaction, "\n".join)
+        boosters = self.rendered_component(
+            interaction.guild, "boosters", lambda: self.construct_booster_string(interaction, "\n".join)
+        )
 
         embed = discord.Embed(color=interaction.guild.me.color, description=boosters)
         embed.set_author(
@@ -307,9 +377,7 @@ class Info(commands.Cog):
         interaction (discord.Interaction): Slash command context object
         """
 
-        embed = discord.Embed(color=interaction.guild.me.color, description=f"[Lenke]({interaction.guild.icon})")
-        embed.set_author(name=interaction.guild.name, icon_url=interaction.guild.icon)
-        embed.set_image(url=interaction.guild.icon)
+        embed = self.asset_embed(interaction.guild, interaction.guild.icon)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.guild_only()
@@ -329,9 +397,7 @@ class Info(commands.Cog):
             embed = embed_templates.error_warning("Serveren har ikke en splash")
             return await interaction.response.send_message(embed=embed)
 
-        embed = discord.Embed(color=interaction.guild.me.color, description=f"[Lenke]({interaction.guild.splash})")
-        embed.set_author(name=interaction.guild.name, icon_url=interaction.guild.icon)
-        embed.set_image(url=interaction.guild.splash)
+        embed = self.asset_embed(interaction.guild, interaction.guild.splash)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.guild_only()
@@ -351,9 +417,7 @@ class Info(commands.Cog):
             embed = embed_templates.error_warning("Serveren har ikke et banner :(")
             return await interaction.response.send_message(embed=embed)
 
-        embed = discord.Embed(color=interaction.guild.me.color, description=f"[Lenke]({interaction.guild.banner})")
-        embed.set_author(name=interaction.guild.name, icon_url=interaction.guild.icon)
-        embed.set_image(url=interaction.guild.banner)
+        embed = self.asset_embed(interaction.guild, interaction.guild.banner)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.guild_only()
@@ -379,7 +443,8 @@ class Info(commands.Cog):
         since_created_days = (interaction.created_at - rolle.created_at).days
 
         # List of members with the role
-        members = self.construct_member_string(rolle.members)
+        role_members = self.bot.get_cog("Members").role_members(rolle)
+        members = self.construct_member_string(role_members)
         members = members if len(members) < 1024 else "For mange medlemmer for å vise her"
 
         # List of permissions
@@ -398,7 +463,7 @@ class Info(commands.Cog):
         embed.add_field(name="Vises separat i medlemsliste", value="Ja" if rolle.hoist else "Nei")
         if permissions:
             embed.add_field(name="Tillatelser", value=permissions, inline=False)
-        embed.add_field(name=f"Brukere med rollen ({len(rolle.members)})", value=members, inline=False)
+        embed.add_field(name=f"Brukere med rollen ({len(role_members)})", value=members, inline=False)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.guild_only()
@@ -415,7 +480,8 @@ class Info(commands.Cog):
         kanal (discord.TextChannel): Text channel to fetch information about
         """
 
-        members = self.construct_member_string(kanal.members)
+        channel_members = self.bot.get_cog("Members").channel_members(kanal)
+        members = self.construct_member_string(channel_members)
         if len(members) > 1024:
             members = "For mange for å vise her"
 
@@ -431,7 +497,7 @@ class Info(commands.Cog):
         )
         if kanal.category:
             embed.add_field(name="Kategori", value=kanal.category.name)
-        embed.add_field(name=f"Antall med tilgang ({len(kanal.members)})", value=members)
+        embed.add_field(name=f"Antall med tilgang ({len(channel_members)})", value=members)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.guild_only()
@@ -473,18 +539,11 @@ class Info(commands.Cog):
         interaction (discord.Interaction): Slash command context object
         """
 
-        roles = sorted(
-            [r for r in interaction.guild.roles if r.name != "@everyone"], key=lambda x: len(x.members), reverse=True
+        await discord_utils.send_persistent_scroller(
+            interaction,
+            "topproller",
+            discord.Embed(color=interaction.guild.me.color, title="Rollene med flest brukere på serveren"),
         )
-        roles_formatted = [f"**#{i + 1}** {r.mention} - {len(r.members)}" for i, r in enumerate(roles)]
-
-        paginator = misc_utils.Paginator(roles_formatted)
-        view = discord_utils.Scroller(paginator, interaction.user)
-
-        embed = view.construct_embed(
-            discord.Embed(color=interaction.guild.me.color, title="Rollene med flest brukere på serveren")
-        )
-        await interaction.response.send_message(embed=embed, view=view)
 
     # NOTE: This command is implemented using the old command framework
     # This is due to lack of emoji support in the new framework
@@ -517,6 +576,57 @@ class Info(commands.Cog):
         embed.set_image(url=emoji.url)
         await ctx.reply(embed=embed)
 
+    def top_roles_paginator(self, interaction: discord.Interaction, key: str) -> misc_utils.Paginator:
+        """
+        Creates a paginator of the roles of the guild with the most users. Only pages that are viewed get formatted
+
+        Parameters
+        ----------
+        interaction (discord.Interaction): Interaction from the guild
+        key (str): Unused
+
+        Returns
+        ----------
+        (misc_utils.Paginator): The paginator
+        """
+
+        members = self.bot.get_cog("Members")
+        counts = {r: members.role_member_count(r) for r in interaction.guild.roles if r.name != "@everyone"}
+        roles = sorted(counts, key=counts.get, reverse=True)
+
+        def producer(start: int, end: int) -> list[str]:
+            return [f"**#{i + 1}** {r.mention} - {counts[r]}" for i, r in enumerate(roles[start:end], start=start)]
+
+        return misc_utils.Paginator(total_count=len(roles), producer=producer)
+
+    def oldest_members_paginator(self, interaction: discord.Interaction, key: str) -> misc_utils.Paginator:
+        """
+        Creates a paginator of the members of the guild sorted by a date. Only pages that are viewed get formatted
+
+        Parameters
+        ----------
+        interaction (discord.Interaction): Interaction from the guild
+        key (str): "lagd" to sort by when the accounts were created, "joined" by when they joined the guild
+
+        Returns
+        ----------
+        (misc_utils.Paginator): The paginator
+        """
+
+        guild = interaction.guild
+        index = self.bot.get_cog("Members")
+        members_by = index.members_by_created if key == "lagd" else index.members_by_joined
+
+        def producer(start: int, end: int) -> list[str]:
+            # Slices the live index, so only the page is copied. Pages follow members joining and leaving
+            lines = []
+            for i, (date, member_id) in enumerate(members_by(guild)[start:end], start=start):
+                name = member.name if (member := guild.get_member(member_id)) else "Ukjent bruker"
+                lines.append(f"**#{i + 1}** {name} - {discord.utils.format_dt(date, style='F')}")
+            return lines
+
+        return misc_utils.Paginator(total_count=len(members_by(guild)), producer=producer)
+
     guild_oldest_group = app_commands.Group(
         name="eldst", description="Viser de eldste medlemmene på serveren", parent=guild_group
     )
@@ -536,23 +646,14 @@ class Info(commands.Cog):
         interaction (discord.Interaction): Slash command context object
         """
 
-        # Sort members by creation date
-        members = sorted(interaction.guild.members, key=lambda m: m.created_at)
-
-        # Create list of members with index, name and creation date
-        members_formatted = [
-            f"**#{i+1}** {m.name} - {discord.utils.format_dt(m.created_at, style='F')}" for i, m in enumerate(members)
-        ]
-
-        paginator = misc_utils.Paginator(members_formatted)
-        view = discord_utils.Scroller(paginator, interaction.user)
-
-        embed = view.construct_embed(
+        await discord_utils.send_persistent_scroller(
+            interaction,
+            "eldst",
             discord.Embed(
                 color=interaction.guild.me.color, title="Eldste brukere på serveren basert på når de ble lagd"
-            )
+            ),
+            key="lagd",
         )
-        await interaction.response.send_message(embed=embed, view=view)
 
     @commands.guild_only()
     @app_commands.checks.bot_has_permissions(embed_links=True)
@@ -569,22 +670,14 @@ class Info(commands.Cog):
         interaction (discord.Interaction): Slash command context object
         """
 
-        # Sort members by creation date
-        members = sorted(interaction.guild.members, key=lambda m: m.joined_at)
-
-        # Create list of members with index, name#discriminator and creation date
-        members_formatted = [
-            f"**#{i+1}** {m.name} - {discord.utils.format_dt(m.joined_at, style='F')}" for i, m in enumerate(members)
-        ]
-
-        paginator = misc_utils.Paginator(members_formatted)
-        view = discord_utils.Scroller(paginator, interaction.user)
-
-        # Send first page
-        embed = view.construct_embed(
-            discord.Embed(color=interaction.guild.me.color, title="Eldste brukere på serveren basert på når de ble med")
+        await discord_utils.send_persistent_scroller(
+            interaction,
+            "eldst",
+            discord.Embed(
+                color=interaction.guild.me.color, title="Eldste brukere på serveren basert på når de ble med"
+            ),
+            key="joined",
         )
-        await interaction.response.send_message(embed=embed, view=view)
 
     @app_commands.guild_only()
     @app_commands.checks.bot_has_permissions(embed_links=True, external_emojis=True)
@@ -613,8 +706,9 @@ class Info(commands.Cog):
             app += "💻"
 
         # Get index of join, creation and/or boost date in comparison to other users in the guild
-        join_index = sorted(interaction.guild.members, key=lambda m: m.joined_at).index(bruker) + 1
-        creation_index = sorted(interaction.guild.members, key=lambda m: m.created_at).index(bruker) + 1
+        members = self.bot.get_cog("Members")
+        join_index = members.joined_position(bruker)
+        creation_index = members.created_position(bruker)
         if bruker.premium_since:
             premium_index = (
                 sorted(interaction.guild.premium_subscribers, key=lambda m: m.premium_since).index(bruker) + 1
@@ -704,9 +798,7 @@ class Info(commands.Cog):
 
         # If the list of roles is too long, send it as a file
         if len(roles) > 2048:
-            await discord_utils.send_as_txt_file(
-                interaction, roles, f"./assets/temp/{interaction.guild.id}_{interaction.user.id}_roles.txt"
-            )
+            await discord_utils.send_as_txt_file(interaction, roles, f"{interaction.guild.id}_{bruker.id}_roles.txt")
         else:
             embed = discord.Embed(color=bruker.color, description=roles)
             embed.set_author(name=f"Roller ({len(bruker.roles)})", icon_url=bruker.display_avatar)
@@ -734,6 +826,55 @@ class Info(commands.Cog):
         embed.set_image(url=bruker.display_avatar)
         await interaction.response.send_message(embed=embed)
 
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        self.rendered.pop(after.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.rendered.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        self.rendered.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.rendered.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self.rendered.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_emojis_update(self, guild: discord.Guild, before: list, after: list):
+        self.rendered.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_stickers_update(self, guild: discord.Guild, before: list, after: list):
+        self.rendered.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        # Boosts are part of the rendered embeds
+        if before.premium_since != after.premium_since:
+            self.rendered.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # Names are global, so a booster changing theirs only shows up here
+        if before.name == after.name:
+            return
+
+        for guild in after.mutual_guilds:
+            if (member := guild.get_member(after.id)) and member.premium_since:
+                self.rendered.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        if member.premium_since:
+            self.rendered.pop(member.guild.id, None)
+
 
 async def setup(bot: commands.Bot):
     """
@@ -0,0 +1,404 @@
+import asyncio
+from bisect import bisect_left
+from bisect import insort
+from collections import Counter
+
+import discord
+from discord.ext import commands
+
+
+class Members(commands.Cog):
+    """
+    Keeps statistics about members up to date as events come in, so commands don't have to go through every member
+    of a guild each time they're used
+    """
+
+    def __init__(self, bot: commands.Bot):
+        """
+        Parameters
+        ----------
+        bot (commands.Bot): The bot instance
+        """
+
+        self.bot = bot
+
+        self.guild_presences: dict[int, Counter] = {}  # guild id -> member count per status, and number of bots
+        # Discord only tells us about member presences, so users in several guilds have to be deduplicated
+        self.user_statuses: dict[int, str] = {}
+        self.user_guild_count = Counter()  # user id -> number of guilds the user shares with the bot
+        self.global_presences = Counter()
+
+        # guild id -> (timestamp, member id) of every member, sorted oldest first
+        self.created_index: dict[int, list[tuple]] = {}
+        self.joined_index: dict[int, list[tuple]] = {}
+
+        # guild id -> role id -> ids of the members with the role. @everyone is left out, everyone has it
+        self.role_index: dict[int, dict[int, set[int]]] = {}
+
+        # guild id -> channel id -> ids of the members that can read the channel. Filled as channels are asked for,
+        # and in the background after startup
+        self.channel_access: dict[int, dict[int, set[int]]] = {}
+        self.channel_access_task = None
+
+    def cog_unload(self):
+        if self.channel_access_task:
+            self.channel_access_task.cancel()
+
+    def rebuild(self):
+        """
+        Counts everything from scratch from the member cache
+        """
+
+        self.guild_presences = {}
+        self.user_statuses = {}
+        self.user_guild_count = Counter()
+        self.global_presences = Counter()
+        self.created_index = {}
+        self.joined_index = {}
+        self.role_index = {}
+        self.channel_access = {}
+
+        for guild in self.bot.guilds:
+            self.guild_presences[guild.id] = Counter()
+            for member in guild.members:
+                self.add_member(member, sort=False)
+
+            # Sorting once is a lot faster than inserting every member in order
+            self.created_index.setdefault(guild.id, []).sort()
+            self.joined_index.setdefault(guild.id, []).sort()
+
+    def add_member(self, member: discord.Member, sort: bool = True):
+        """
+        Counts a member and adds it to the indexes
+
+        Parameters
+        ----------
+        member (discord.Member): The member
+        sort (bool): Whether to insert the member in order. If not, the indexes have to be sorted afterwards
+        """
+
+        for index, key in self.index_keys(member):
+            if sort:
+                insort(index, key)
+            else:
+                index.append(key)
+
+        self.add_roles(member, member.roles)
+        self.update_channel_access(member)
+
+        presences = self.guild_presences.setdefault(member.guild.id, Counter())
+        presences[str(member.status)] += 1
+        if member.bot:
+            presences["bot"] += 1
+
+        self.user_guild_count[member.id] += 1
+        if member.id not in self.user_statuses:
+            self.user_statuses[member.id] = str(member.status)
+            self.global_presences[str(member.status)] += 1
+
+    def remove_member(self, member: discord.Member):
+        for index, key in self.index_keys(member):
+            i = bisect_left(index, key)
+            if i < len(index) and index[i] == key:
+                del index[i]
+
+        self.remove_roles(member, member.roles)
+        for channel_members in self.channel_access.get(member.guild.id, {}).values():
+            channel_members.discard(member.id)
+
+        presences = self.guild_presences.setdefault(member.guild.id, Counter())
+        presences[str(member.status)] -= 1
+        if member.bot:
+            presences["bot"] -= 1
+
+        self.user_guild_count[member.id] -= 1
+        if self.user_guild_count[member.id] <= 0:
+            del self.user_guild_count[member.id]
+            if (status := self.user_statuses.pop(member.id, None)) is not None:
+                self.global_presences[status] -= 1
+
+    def index_keys(self, member: discord.Member) -> list[tuple[list, tuple]]:
+        keys = [(self.created_index.setdefault(member.guild.id, []), (member.created_at, member.id))]
+        # Members from some events don't have a join date. They're left out rather than guessed
+        if member.joined_at:
+            keys.append((self.joined_index.setdefault(member.guild.id, []), (member.joined_at, member.id)))
+        return keys
+
+    def add_roles(self, member: discord.Member, roles: list[discord.Role]):
+        guild_roles = self.role_index.setdefault(member.guild.id, {})
+        for role in roles:
+            if not role.is_default():
+                guild_roles.setdefault(role.id, set()).add(member.id)
+
+    def remove_roles(self, member: discord.Member, roles: list[discord.Role]):
+        guild_roles = self.role_index.setdefault(member.guild.id, {})
+        for role in roles:
+            if (role_members := guild_roles.get(role.id)) is not None:
+                role_members.discard(member.id)
+
+    def update_channel_access(self, member: discord.Member):
+        """
+        Checks again which of the known channels of its guild the member can read
+        """
+
+        for channel_id, channel_members in self.channel_access.get(member.guild.id, {}).items():
+            channel = member.guild.get_channel(channel_id)
+            if channel and channel.permissions_for(member).read_messages:
+                channel_members.add(member.id)
+            else:
+                channel_members.discard(member.id)
+
+    def channel_member_ids(self, channel: discord.abc.GuildChannel) -> set[int]:
+        """
+        Returns the ids of the members that can read a channel. Computed the first time the channel is asked for
+
+        Parameters
+        ----------
+        channel (discord.abc.GuildChannel): The channel
+
+        Returns
+        ----------
+        (set[int]): IDs of the members that can read the channel. Don't modify it
+        """
+
+        guild_channels = self.channel_access.setdefault(channel.guild.id, {})
+        if channel.id not in guild_channels:
+            guild_channels[channel.id] = {
+                member.id for member in channel.guild.members if channel.permissions_for(member).read_messages
+            }
+        return guild_channels[channel.id]
+
+    def channel_members(self, channel: discord.abc.GuildChannel) -> list[discord.Member]:
+        """
+        Returns the members that can read a channel
+
+        Parameters
+        ----------
+        channel (discord.abc.GuildChannel): The channel
+
+        Returns
+        ----------
+        (list[discord.Member]): Members that can read the channel
+        """
+
+        member_ids = self.channel_member_ids(channel)
+        return [member for member_id in member_ids if (member := channel.guild.get_member(member_id))]
+
+    def invalidate_channel_access(self, guild: discord.Guild, channel_id: int | None = None):
+        """
+        Forgets who can read a channel, or every channel of a guild if no channel is given
+        """
+
+        if channel_id is None:
+            self.channel_access.pop(guild.id, None)
+        else:
+            self.channel_access.get(guild.id, {}).pop(channel_id, None)
+
+    async def compute_channel_access(self):
+        """
+        Computes who can read every text channel, one channel at a time so other events aren't held up for long
+        """
+
+        for guild in self.bot.guilds:
+            for channel in guild.text_channels:
+                self.channel_member_ids(channel)
+                await asyncio.sleep(0)
+
+    def role_member_count(self, role: discord.Role) -> int:
+        """
+        Returns the number of members with a role
+
+        Parameters
+        ----------
+        role (discord.Role): The role
+
+        Returns
+        ----------
+        (int): Number of members with the role
+        """
+
+        if role.is_default():
+            return role.guild.member_count or 0
+        return len(self.role_index.get(role.guild.id, {}).get(role.id, ()))
+
+    def role_members(self, role: discord.Role) -> list[discord.Member]:
+        """
+        Returns the members with a role
+
+        Parameters
+        ----------
+        role (discord.Role): The role
+
+        Returns
+        ----------
+        (list[discord.Member]): Members with the role
+        """
+
+        if role.is_default():
+            return list(role.guild.members)
+
+        member_ids = self.role_index.get(role.guild.id, {}).get(role.id, ())
+        return [member for member_id in member_ids if (member := role.guild.get_member(member_id))]
+
+    def members_by_created(self, guild: discord.Guild) -> list[tuple]:
+        """
+        Returns the members of a guild sorted by when their accounts were created, oldest first
+
+        Parameters
+        ----------
+        guild (discord.Guild): The guild
+
+        Returns
+        ----------
+        (list[tuple]): Creation date and id of every member. Don't modify it
+        """
+
+        return self.created_index.get(guild.id, [])
+
+    def members_by_joined(self, guild: discord.Guild) -> list[tuple]:
+        """
+        Returns the members of a guild sorted by when they joined, oldest first
+
+        Parameters
+        ----------
+        guild (discord.Guild): The guild
+
+        Returns
+        ----------
+        (list[tuple]): Join date and id of every member. Don't modify it
+        """
+
+        return self.joined_index.get(guild.id, [])
+
+    def created_position(self, member: discord.Member) -> int:
+        """
+        Returns the member's place among the members of its guild, oldest account first. Starts at 1
+        """
+
+        return bisect_left(self.members_by_created(member.guild), (member.created_at, member.id)) + 1
+
+    def joined_position(self, member: discord.Member) -> int:
+        """
+        Returns the member's place among the members of its guild, first to join first. Starts at 1
+        """
+
+        return bisect_left(self.members_by_joined(member.guild), (member.joined_at, member.id)) + 1
+
+    def guild_presence_counts(self, guild: discord.Guild) -> Counter:
+        """
+        Returns the number of members of a guild per status, and the number of bots
+
+        Parameters
+        ----------
+        guild (discord.Guild): The guild
+
+        Returns
+        ----------
+        (Counter): Counts keyed by "online", "idle", "dnd", "offline" and "bot"
+        """
+
+        return self.guild_presences.get(guild.id, Counter())
+
+    def global_presence_counts(self) -> tuple[int, Counter]:
+        """
+        Returns the number of unique users across all guilds, and how many of them have each status
+
+        Returns
+        ----------
+        (tuple[int, Counter]): Number of users, and counts keyed by "online", "idle", "dnd" and "offline"
+        """
+
+        return len(self.user_guild_count), self.global_presences
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Also fires after reconnecting, when events may have been missed
+        self.rebuild()
+
+        if self.channel_access_task:
+            self.channel_access_task.cancel()
+        self.channel_access_task = asyncio.create_task(self.compute_channel_access())
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        self.rebuild()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.rebuild()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.add_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.remove_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles == after.roles:
+            return
+
+        before_roles = set(before.roles)
+        after_roles = set(after.roles)
+        self.remove_roles(after, before_roles - after_roles)
+        self.add_roles(after, after_roles - before_roles)
+        self.update_channel_access(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.role_index.get(role.guild.id, {}).pop(role.id, None)
+        self.invalidate_channel_access(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.permissions != after.permissions:
+            self.invalidate_channel_access(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        # Channels synced with a category get their own update when the category's overwrites change
+        if before.overwrites != after.overwrites:
+            self.invalidate_channel_access(after.guild, after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self.invalidate_channel_access(channel.guild, channel.id)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before: discord.Member, after: discord.Member):
+        """
+        Moves the member from its old status to its new one. Fires once per guild the member shares with the bot
+        """
+
+        if before.status == after.status:
+            return
+
+        presences = self.guild_presences.setdefault(after.guild.id, Counter())
+        presences[str(before.status)] -= 1
+        presences[str(after.status)] += 1
+
+        # The other guilds' events for the same change find it already done
+        old_status = self.user_statuses.get(after.id)
+        if old_status is not None and old_status != str(after.status):
+            self.global_presences[old_status] -= 1
+            self.global_presences[str(after.status)] += 1
+            self.user_statuses[after.id] = str(after.status)
+
+
+async def setup(bot: commands.Bot):
+    """
+    Add the cog to the bot on extension load
+
+    Parameters
+    ----------
+    bot (commands.Bot): Bot instance
+    """
+
+    cog = Members(bot)
+    # When the extension is reloaded the bot is already ready, and on_ready won't fire again
+    if bot.is_ready():
+        cog.rebuild()
+        cog.channel_access_task = asyncio.create_task(cog.compute_channel_access())
+    await bot.add_cog(cog)
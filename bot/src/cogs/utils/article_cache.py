@@ -0,0 +1,164 @@
+import time
+
+import asyncpg
+
+from .misc_utils import LRUCache
+
+# Version of the way articles are rendered. Bump it whenever the output changes, so articles cached by the old
+# pipeline aren't served anymore
+RENDER_VERSION = 1
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalizes a title the way MediaWiki does. Underscores are spaces and the first letter is always uppercase
+
+    Parameters
+    ----------
+    title (str): The title
+
+    Returns
+    ----------
+    (str): The normalized title
+    """
+
+    title = " ".join(title.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+class ArticleCache:
+    """
+    Two tier cache of rendered Viteboka articles, keyed by page id, revision id and render version.
+    An in-memory LRU sits in front of a Postgres table that survives restarts.
+    A new revision of an article gets a new key, so edits on the wiki invalidate the cache by themselves.
+    So does a new RENDER_VERSION
+    """
+
+    def __init__(self, db: asyncpg.Pool, max_size: int = 256, title_ttl: float = 600):
+        """
+        Parameters
+        ----------
+        db (asyncpg.Pool): The bot's database pool
+        max_size (int): Max number of articles kept in memory
+        title_ttl (float): Seconds a title's latest revision is trusted before asking the wiki again
+        """
+
+        self.db = db
+        self.title_ttl = title_ttl
+        self.articles = LRUCache(max_size)
+        self.titles = LRUCache(max_size * 4)  # normalized title -> (page id, revision id, time checked)
+
+    async def init_db(self):
+        """
+        Create the necessary tables for the cache to work
+        """
+
+        await self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS viteboka_article_cache (
+                page_id BIGINT PRIMARY KEY,
+                revision_id BIGINT NOT NULL,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                text TEXT NOT NULL,
+                image TEXT,
+                render_version INTEGER NOT NULL,
+                cached_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc')
+            );
+            """
+        )
+
+    def get_revision(self, title: str) -> tuple[int, int] | None:
+        """
+        Returns the latest known revision of a title, if it was checked recently enough to be trusted
+
+        Parameters
+        ----------
+        title (str): The title of the article
+
+        Returns
+        ----------
+        (tuple[int, int] | None): Page id and revision id
+        """
+
+        if not (entry := self.titles.get(normalize_title(title))):
+            return None
+
+        page_id, revision_id, checked_at = entry
+        if time.monotonic() - checked_at > self.title_ttl:
+            return None
+
+        return page_id, revision_id
+
+    def set_revision(self, title: str, page_id: int, revision_id: int):
+        """
+        Remembers the latest revision of a title
+
+        Parameters
+        ----------
+        title (str): The title of the article. Both the requested and the canonical title should be stored
+        page_id (int): The page id of the article
+        revision_id (int): The latest revision id of the article
+        """
+
+        self.titles.set(normalize_title(title), (page_id, revision_id, time.monotonic()))
+
+    async def get(self, page_id: int, revision_id: int) -> tuple | None:
+        """
+        Looks up a rendered article, first in memory and then in the database
+
+        Parameters
+        ----------
+        page_id (int): The page id of the article
+        revision_id (int): The revision the article should be rendered from
+
+        Returns
+        ----------
+        (tuple | None): The title, url, text and image of the article. None if not cached
+        """
+
+        if article := self.articles.get((page_id, revision_id)):
+            return article
+
+        row = await self.db.fetchrow(
+            """
+            SELECT title, url, text, image
+            FROM viteboka_article_cache
+            WHERE page_id = $1 AND revision_id = $2 AND render_version = $3;
+            """,
+            page_id,
+            revision_id,
+            RENDER_VERSION,
+        )
+        if not row:
+            return None
+
+        article = tuple(row.values())
+        self.articles.set((page_id, revision_id), article)
+        return article
+
+    async def set(self, page_id: int, revision_id: int, article: tuple):
+        """
+        Stores a rendered article in both tiers. Older revisions of the article are replaced
+
+        Parameters
+        ----------
+        page_id (int): The page id of the article
+        revision_id (int): The revision the article was rendered from
+        article (tuple): The title, url, text and image of the article
+        """
+
+        self.articles.set((page_id, revision_id), article)
+        await self.db.execute(
+            """
+            INSERT INTO viteboka_article_cache (page_id, revision_id, title, url, text, image, render_version)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            ON CONFLICT (page_id) DO UPDATE
+            SET revision_id = $2, title = $3, url = $4, text = $5, image = $6, render_version = $7,
+                cached_at = (NOW() AT TIME ZONE 'utc');
+            """,
+            page_id,
+            revision_id,
+            *article,
+            RENDER_VERSION,
+        )
@@ -1,35 +1,33 @@
-import os
+import inspect
+import io
+import time
 
 import discord
 from discord.ext import commands
 
+from .misc_utils import LRUCache
 from .misc_utils import Paginator
 
+# Content of persistent scrollers. Name -> function that takes an interaction and a key and returns a paginator
+SCROLLER_SOURCES: dict[str, callable] = {}
+SCROLLER_CACHE_SIZE = 64
+SCROLLER_CACHE_TIME = 300  # Seconds before content is made again, so it doesn't go stale
+scroller_cache = LRUCache(SCROLLER_CACHE_SIZE)  # (source, guild id, key) -> (time made, paginator)
 
-async def send_as_txt_file(interaction: discord.Interaction, content: str, file_path: str):
+
+async def send_as_txt_file(interaction: discord.Interaction, content: str, filename: str):
     """
-    Sends a string as a txt file and deletes the file afterwards
+    Sends a string as a txt file. The file is made in memory, so nothing touches the disk
 
     Parameters
     ----------
     interaction (discord.Interaction): Slash command context object
     content (str): String that's too long to send
-    file_path (str): Path to file
+    filename (str): Name of the file
     """
 
-    # Create file
-    with open(file_path, "w", encoding="utf-8") as file:
-        file.write(content)
-
-    # Send file
-    txt_file = discord.File(file_path)
-    await interaction.response.send_message(file=txt_file)
-
-    # Delete file
-    try:
-        os.remove(file_path)
-    except OSError:
-        pass
+    data = io.BytesIO(content.encode("utf-8"))
+    await interaction.response.send_message(file=discord.File(data, filename=filename))
 
 
 async def get_discord_guild(bot: commands.Bot, id: int) -> discord.Guild | None:
@@ -121,136 +119,194 @@ async def get_guild_role(bot: commands.Bot, guild: discord.Guild, role_id: int)
     return role
 
 
-class ScrollerButton(discord.ui.Button):
-    """Button that scrolls through pages in a scroller view"""
+def register_scroller_source(name: str, source: callable):
+    """
+    Registers content that persistent scrollers can page through
 
-    def __init__(
-        self,
-        paginator: Paginator,
-        button_action: callable,
-        content_constructor: callable,
-        owner: discord.User | discord.Member,
-        label: str,
-        disabled: bool = False,
-    ):
-        """
-        Parameters
-        -----------
-        paginator (Paginator): The paginator object that contains the data to be paginated
-        button_action (callable): The function that returns the requested page
-        content_constructor (callable): A function that takes a paginator object and a page number and returns an embed
-        owner (discord.User|discord.Member): The user that invoked the paginator. Only this user can use the button
-        """
+    Parameters
+    ----------
+    name (str): Name of the content. Lowercase letters and underscores only, since it's stored in the buttons
+    source (callable): Function, sync or async, that takes an interaction and a key and returns a paginator
+    """
 
-        super().__init__(label=label, disabled=disabled)
-        self.paginator = paginator
-        self.button_action = button_action
-        self.content_constructor = content_constructor
-        self.owner = owner
+    SCROLLER_SOURCES[name] = source
+    # Content made by the old source shouldn't be shown anymore, e.g. when a cog is reloaded
+    for cache_key in [cache_key for cache_key in scroller_cache.items if cache_key[0] == name]:
+        scroller_cache.pop(cache_key)
 
-    async def callback(self, interaction: discord.Interaction):
-        """
-        What to do when the button is pressed
 
-        Parameters
-        -----------
-        interaction (discord.Interaction): Slash command context object
-        """
+async def get_scroller_paginator(interaction: discord.Interaction, source: str, key: str = "") -> Paginator | None:
+    """
+    Returns the paginator of a persistent scroller. It's made again if it isn't cached, e.g. after a restart
 
-        if interaction.user.id != self.owner.id:
-            return await interaction.response.send_message(
-                "Bare den som skrev kommandoen kan bruke denne knappen", ephemeral=True
-            )
+    Parameters
+    ----------
+    interaction (discord.Interaction): Interaction the content is needed for
+    source (str): Name the content is registered under
+    key (str): Which content of the source to get
 
-        await interaction.response.defer()
+    Returns
+    ----------
+    (Paginator|None): The paginator. None if the source isn't registered
+    """
 
-        content = self.content_constructor(self.button_action(), interaction.message.embeds[0])
-        await interaction.message.edit(
-            embed=content, view=Scroller(self.paginator, self.owner, self.content_constructor)
-        )
+    if source not in SCROLLER_SOURCES:
+        return None
+
+    cache_key = (source, interaction.guild_id, key)
+    cached = scroller_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < SCROLLER_CACHE_TIME:
+        return cached[1]
+
+    paginator = SCROLLER_SOURCES[source](interaction, key)
+    if inspect.isawaitable(paginator):
+        paginator = await paginator
+
+    scroller_cache.set(cache_key, (time.monotonic(), paginator))
+    return paginator
 
 
-class Scroller(discord.ui.View):
-    """View that allows scrolling through pages of data using the pagination module"""
+async def construct_scroller_embed(paginator: Paginator, page: int, embed: discord.Embed) -> discord.Embed:
+    """
+    Puts a page of a persistent scroller in an embed
+
+    Parameters
+    ----------
+    paginator (Paginator): Paginator of the content. Shared between scrollers
+    page (int): The page to show
+    embed (discord.Embed): Embed to add the page to
+
+    Returns
+    ----------
+    (discord.Embed): The embed
+    """
+
+    embed.description = "\n".join(await paginator.get_page(page) or [])
+    embed.set_footer(text=f"Side {page}/{paginator.total_page_count}")
+    return embed
 
-    def __init__(
-        self, paginatior: Paginator, owner: discord.User | discord.Member, content_constructor: callable = None
-    ):
+
+class PersistentScrollerButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"scroller:(?P<source>[a-z_]+):(?P<key>[0-9a-z_]*):(?P<owner>[0-9]+):(?P<page>[0-9]+):(?P<action>[a-z]+)",
+):
+    """
+    Button of a persistent scroller. Everything it needs is stored in its custom id, so nothing is kept in memory
+    for the message and the button keeps working after the bot restarts
+    """
+
+    ACTIONS = {"first": "<<", "previous": "<", "next": ">", "last": ">>"}
+
+    def __init__(self, source: str, key: str, owner_id: int, page: int, action: str, disabled: bool = False):
         """
         Parameters
         -----------
-        paginator (Paginator): The paginator object that contains the data to be paginated
-        owner (discord.User|discord.Member): The user that invoked the paginator. Only this user can use the buttons
-        content_constructor (callable): A function that takes a paginator object and a page number and returns an embed
+        source (str): Name the content is registered under
+        key (str): Which content of the source is shown
+        owner_id (int): ID of the user that invoked the scroller. Only this user can use the button
+        page (int): The page currently shown
+        action (str): Where the button goes. "first", "previous", "next" or "last"
+        disabled (bool): Whether the button is disabled
         """
 
-        super().__init__()
-        self.paginator = paginatior
-        self.content_constructor = content_constructor if content_constructor else self.__default_content_constructor
-
-        self.add_item(
-            ScrollerButton(
-                self.paginator,
-                self.paginator.first_page,
-                self.content_constructor,
-                owner,
-                label="<<",
-                disabled=self.paginator.current_page == 1,
+        super().__init__(
+            discord.ui.Button(
+                label=self.ACTIONS[action],
+                custom_id=f"scroller:{source}:{key}:{owner_id}:{page}:{action}",
+                disabled=disabled,
             )
         )
-        self.add_item(
-            ScrollerButton(
-                self.paginator,
-                self.paginator.previous_page,
-                self.content_constructor,
-                owner,
-                label="<",
-                disabled=self.paginator.current_page == 1,
-            )
-        )
-        self.add_item(
-            ScrollerButton(
-                self.paginator,
-                self.paginator.next_page,
-                self.content_constructor,
-                owner,
-                label=">",
-                disabled=self.paginator.current_page == self.paginator.total_page_count,
-            )
-        )
-        self.add_item(
-            ScrollerButton(
-                self.paginator,
-                self.paginator.last_page,
-                self.content_constructor,
-                owner,
-                label=">>",
-                disabled=self.paginator.current_page == self.paginator.total_page_count,
+        self.source = source
+        self.key = key
+        self.owner_id = owner_id
+        self.page = page
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: discord.Interaction, item: discord.ui.Button, match
+    ) -> "PersistentScrollerButton":
+        return cls(match["source"], match["key"], int(match["owner"]), int(match["page"]), match["action"])
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "Bare den som skrev kommandoen kan bruke denne knappen", ephemeral=True
             )
-        )
+            return False
+        return True
 
-    def construct_embed(self, base_embed: discord.Embed):
+    async def callback(self, interaction: discord.Interaction):
         """
-        Constructs the embed to be displayed
+        What to do when the button is pressed
 
         Parameters
         -----------
-        base_embed (discord.Embed): The base embed to add fields to
+        interaction (discord.Interaction): Button interaction object
         """
 
-        return self.content_constructor(self.paginator.get_current_page(), embed=base_embed)
+        await interaction.response.defer()
 
-    def __default_content_constructor(self, page: list, embed: discord.Embed) -> discord.Embed:
-        """
-        Default embed template for the paginator
+        paginator = await get_scroller_paginator(interaction, self.source, self.key)
+        if paginator is None:
+            return await interaction.followup.send("Denne listen finnes ikke lenger", ephemeral=True)
 
-        Parameters
-        ----------
-        paginator (Paginator): Paginator dataclass
-        page (list): List of streaks to display on a page
-        embed (discord.Embed): Embed to add fields to
-        """
+        targets = {
+            "first": 1,
+            "previous": self.page - 1,
+            "next": self.page + 1,
+            "last": paginator.total_page_count,
+        }
+        # The content may have shrunk since the buttons were made
+        page = max(min(targets.get(self.action, self.page), paginator.total_page_count), 1)
+
+        embed = await construct_scroller_embed(paginator, page, interaction.message.embeds[0])
+        view = persistent_scroller_view(self.source, self.key, self.owner_id, page, paginator.total_page_count)
+        await interaction.message.edit(embed=embed, view=view)
+
+
+def persistent_scroller_view(source: str, key: str, owner_id: int, page: int, total_page_count: int) -> discord.ui.View:
+    """
+    Creates the buttons of a persistent scroller
+
+    Parameters
+    ----------
+    source (str): Name the content is registered under
+    key (str): Which content of the source is shown
+    owner_id (int): ID of the user that invoked the scroller. Only this user can use the buttons
+    page (int): The page shown
+    total_page_count (int): Number of pages
+
+    Returns
+    ----------
+    (discord.ui.View): View with the buttons
+    """
+
+    view = discord.ui.View(timeout=None)
+    for action in PersistentScrollerButton.ACTIONS:
+        disabled = page <= 1 if action in ("first", "previous") else page >= total_page_count
+        view.add_item(PersistentScrollerButton(source, key, owner_id, page, action, disabled=disabled))
+
+    # The registered dynamic item handles the buttons, so the view itself doesn't have to be kept around
+    view.stop()
+    return view
+
+
+async def send_persistent_scroller(
+    interaction: discord.Interaction, source: str, base_embed: discord.Embed, key: str = ""
+):
+    """
+    Responds with the first page of a persistent scroller
+
+    Parameters
+    ----------
+    interaction (discord.Interaction): Slash command context object
+    source (str): Name the content is registered under with register_scroller_source
+    base_embed (discord.Embed): Embed to add the pages to
+    key (str): Which content of the source to show. Lowercase letters, digits and underscores only
+    """
 
-        embed.description = "\n".join(page)
-        embed.set_footer(text=f"Side {self.paginator.current_page}/{self.paginator.total_page_count}")
-        return embed
+    paginator = await get_scroller_paginator(interaction, source, key)
+    embed = await construct_scroller_embed(paginator, 1, base_embed)
+    view = persistent_scroller_view(source, key, interaction.user.id, 1, paginator.total_page_count)
+    await interaction.response.send_message(embed=embed, view=view)
@@ -1,4 +1,6 @@
 import datetime
+import inspect
+from collections import OrderedDict
 from math import ceil
 from zoneinfo import ZoneInfo
 
@@ -6,20 +8,40 @@ MIDNIGHT = datetime.time(hour=0, minute=0, tzinfo=ZoneInfo("Europe/Oslo"))
 
 
 class Paginator:
-    """Interface for managing content. Divides your content into pages of 10 items each"""
-
-    def __init__(self, content: list):
+    """
+    Interface for managing content. Divides your content into pages of 10 items each
+
+    The content can either be given as a list, or be produced one page at a time by a function. Then only the pages
+    that are actually viewed are ever made
+    """
+
+    def __init__(
+        self,
+        content: list | None = None,
+        total_count: int | None = None,
+        producer: callable = None,
+        cache_size: int = 0,
+    ):
         """
         Parameters
         ----------
-        content (list): The content you want to paginate
+        content (list|None): The content you want to paginate
+        total_count (int|None): Number of items the producer can produce. Required with a producer
+        producer (callable): Function, sync or async, that takes a start and end index and returns those items
+        cache_size (int): Number of produced pages to keep. 0 to produce pages every time they're viewed
         """
 
+        if content is None and (producer is None or total_count is None):
+            raise ValueError("Either content or a producer and a total count is required")
+
         self.content = content
-        self.total_page_count = ceil(len(content) / 10)
-        self.current_page = 1
+        self.producer = producer
+        self.page_size = 10
+        self.total_count = len(content) if content is not None else total_count
+        self.total_page_count = ceil(self.total_count / self.page_size)
+        self.cache = LRUCache(cache_size) if cache_size else None
 
-    def get_page(self, page: int) -> list | None:
+    async def get_page(self, page: int) -> list | None:
         """
         Returns the page of the paginator
 
@@ -35,66 +57,82 @@ class Paginator:
         if page < 1 or page > self.total_page_count:
             return None
 
-        start_index = (page - 1) * 10
-        end_index = page * 10
+        start_index = (page - 1) * self.page_size
+        end_index = min(page * self.page_size, self.total_count)
 
-        return self.content[start_index:end_index]
+        if self.content is not None:
+            return self.content[start_index:end_index]
 
-    def get_current_page(self) -> list:
-        """
-        Returns the current page of the paginator
+        if self.cache is not None and (cached := self.cache.get(page)) is not None:
+            return cached
 
-        Returns
-        ----------
-        (list): The current page of the paginator
-        """
+        items = self.producer(start_index, end_index)
+        if inspect.isawaitable(items):
+            items = await items
+        items = list(items)
 
-        return self.get_page(self.current_page)
+        if self.cache is not None:
+            self.cache.set(page, items)
 
-    def next_page(self) -> list | None:
-        """
-        Returns the next page of the paginator
+        return items
 
-        Returns
-        ----------
-        (list): The next page of the paginator
-        """
 
-        self.current_page += 1
-        return self.get_page(self.current_page)
+class LRUCache:
+    """Dict-like cache that forgets the least recently used item when it's full"""
 
-    def previous_page(self) -> list | None:
+    def __init__(self, max_size: int = 128):
         """
-        Returns the previous page of the paginator
-
-        Returns
+        Parameters
         ----------
-        (list): The previous page of the paginator
+        max_size (int): Max number of items kept in the cache
         """
 
-        self.current_page -= 1
-        return self.get_page(self.current_page)
+        self.max_size = max_size
+        self.items = OrderedDict()
 
-    def first_page(self) -> list | None:
+    def get(self, key, default=None):
         """
-        Returns the first page of the paginator
+        Returns the item stored under the key and marks it as recently used
+
+        Parameters
+        ----------
+        key (Hashable): The key to look up
+        default (Any): Returned if the key isn't cached
 
         Returns
         ----------
-        (list): The first page of the paginator
+        (Any): The cached item or the default value
         """
 
-        self.current_page = 1
-        return self.get_page(self.current_page)
+        if key not in self.items:
+            return default
+
+        self.items.move_to_end(key)
+        return self.items[key]
 
-    def last_page(self) -> list | None:
+    def set(self, key, value):
         """
-        Returns the last page of the paginator
+        Stores an item, evicting the least recently used item if the cache is full
 
-        Returns
+        Parameters
         ----------
-        (list): The last page of the paginator
+        key (Hashable): The key to store the item under
+        value (Any): The item
         """
 
-        self.current_page = self.total_page_count
-        return self.get_page(self.current_page)
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.items.pop(key, default)
+
+    def clear(self):
+        self.items.clear()
+
+    def __contains__(self, key) -> bool:
+        return key in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
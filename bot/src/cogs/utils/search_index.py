@@ -0,0 +1,332 @@
+from datetime import datetime
+from datetime import timezone
+from typing import NamedTuple
+
+import asyncpg
+
+from .wikitext import plain_text
+
+# Pages per request when crawling. 50 is the most MediaWiki allows when fetching content
+CRAWL_BATCH_SIZE = 50
+
+SEARCH_CONFIG = "norwegian"
+
+# Characters of text shown under every search result
+SNIPPET_LENGTH = 100
+
+
+class SearchResult(NamedTuple):
+    title: str
+    page_id: int
+    revision_id: int
+    snippet: str
+
+
+def snippet(wikitext: str) -> str:
+    """
+    Returns the first words of an article, as plain text on a single line
+
+    Parameters
+    ----------
+    wikitext (str): The start of the article's wikitext
+
+    Returns
+    ----------
+    (str): The snippet
+    """
+
+    text = " ".join(plain_text(wikitext, SNIPPET_LENGTH).split())
+    return text[:SNIPPET_LENGTH].rsplit(" ", 1)[0] + "..." if len(text) > SNIPPET_LENGTH else text
+
+
+def revision_content(revision: dict) -> str:
+    """
+    Returns the wikitext of a revision. Newer MediaWiki versions keep it in slots, older ones don't
+
+    Parameters
+    ----------
+    revision (dict): A revision from the API, fetched with formatversion=2
+
+    Returns
+    ----------
+    (str): The wikitext
+    """
+
+    return revision.get("slots", {}).get("main", revision).get("content", "")
+
+
+class SearchIndex:
+    """
+    Full-text index of Viteboka's main namespace, kept in Postgres.
+    Built from a crawl of the wiki and kept current by polling recentchanges
+    """
+
+    def __init__(self, db: asyncpg.Pool):
+        """
+        Parameters
+        ----------
+        db (asyncpg.Pool): The bot's database pool
+        """
+
+        self.db = db
+
+    async def init_db(self):
+        """
+        Create the necessary tables for the index to work
+        """
+
+        await self.db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS viteboka_pages (
+                page_id BIGINT PRIMARY KEY,
+                title TEXT NOT NULL,
+                revision_id BIGINT NOT NULL,
+                wikitext TEXT NOT NULL,
+                search TSVECTOR GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A')
+                    || setweight(to_tsvector('{SEARCH_CONFIG}', wikitext), 'B')
+                ) STORED,
+                updated_at TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'utc')
+            );
+            CREATE INDEX IF NOT EXISTS viteboka_pages_search ON viteboka_pages USING GIN (search);
+            CREATE TABLE IF NOT EXISTS viteboka_sync (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+
+    async def search(self, query: str, limit: int = 5) -> list[SearchResult]:
+        """
+        Searches the index. Matches in titles weigh more than matches in the text
+
+        Parameters
+        ----------
+        query (str): What the user typed. Supports "quoted phrases", or and -excluded words
+        limit (int): Max number of results
+
+        Returns
+        ----------
+        (list[SearchResult]): The matching articles, best match first
+        """
+
+        rows = await self.db.fetch(
+            f"""
+            SELECT title, page_id, revision_id, LEFT(wikitext, {SNIPPET_LENGTH * 20}) AS lead
+            FROM viteboka_pages, websearch_to_tsquery('{SEARCH_CONFIG}', $1) AS query
+            WHERE search @@ query
+            ORDER BY LOWER(title) = LOWER($1) DESC, ts_rank_cd(search, query) DESC, title
+            LIMIT $2;
+            """,
+            query,
+            limit,
+        )
+        return [SearchResult(row["title"], row["page_id"], row["revision_id"], snippet(row["lead"])) for row in rows]
+
+    async def titles(self) -> list[str]:
+        """
+        Returns the titles of every article in the index
+        """
+
+        return [row["title"] for row in await self.db.fetch("SELECT title FROM viteboka_pages;")]
+
+    async def upsert(self, pages: list[tuple[int, str, int, str]]):
+        """
+        Adds or updates pages in the index
+
+        Parameters
+        ----------
+        pages (list[tuple[int, str, int, str]]): Page id, title, revision id and wikitext of every page
+        """
+
+        await self.db.executemany(
+            """
+            INSERT INTO viteboka_pages (page_id, title, revision_id, wikitext)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (page_id) DO UPDATE
+            SET title = $2, revision_id = $3, wikitext = $4, updated_at = (NOW() AT TIME ZONE 'utc')
+            WHERE viteboka_pages.revision_id <= $3;
+            """,
+            pages,
+        )
+
+    async def delete(self, page_ids: list[int] | None = None, titles: list[str] | None = None):
+        """
+        Removes pages from the index
+
+        Parameters
+        ----------
+        page_ids (list[int]): Page ids of the pages to remove
+        titles (list[str]): Titles of the pages to remove. Deleted pages don't always have a page id anymore
+        """
+
+        await self.db.execute(
+            """
+            DELETE FROM viteboka_pages
+            WHERE page_id = ANY($1::BIGINT[]) OR title = ANY($2::TEXT[]);
+            """,
+            page_ids or [],
+            titles or [],
+        )
+
+    async def get_sync_state(self, name: str) -> str | None:
+        return await self.db.fetchval("SELECT value FROM viteboka_sync WHERE name = $1;", name)
+
+    async def set_sync_state(self, name: str, value: str):
+        await self.db.execute(
+            """
+            INSERT INTO viteboka_sync (name, value)
+            VALUES ($1, $2)
+            ON CONFLICT (name) DO UPDATE
+            SET value = $2;
+            """,
+            name,
+            value,
+        )
+
+    async def fetch_pages(self, api, page_ids: list[int]):
+        """
+        Fetches the latest revision of pages and stores them. Pages that aren't articles anymore are removed
+
+        Parameters
+        ----------
+        api (VitebokaAPI): Client to fetch the pages with
+        page_ids (list[int]): Page ids of the pages to fetch
+        """
+
+        for i in range(0, len(page_ids), CRAWL_BATCH_SIZE):
+            batch = page_ids[i : i + CRAWL_BATCH_SIZE]
+            data = await api.get(
+                {
+                    "action": "query",
+                    "format": "json",
+                    "formatversion": 2,
+                    "pageids": "|".join(str(page_id) for page_id in batch),
+                    "prop": "info|revisions",
+                    "rvprop": "ids|content",
+                    "rvslots": "main",
+                }
+            )
+
+            pages = []
+            missing = []
+            for page in data.get("query", {}).get("pages", []):
+                # Redirects are left out of the index, just like when crawling
+                if page.get("missing") or page.get("redirect") or page.get("ns") != 0 or not page.get("revisions"):
+                    missing.append(page["pageid"])
+                    continue
+                revision = page["revisions"][0]
+                pages.append((page["pageid"], page["title"], revision["revid"], revision_content(revision)))
+
+            await self.upsert(pages)
+            if missing:
+                await self.delete(page_ids=missing)
+
+    async def crawl(self, api) -> int:
+        """
+        Indexes every page in the main namespace. Only needed once, after that poll_changes keeps the index current
+
+        Parameters
+        ----------
+        api (VitebokaAPI): Client to fetch the pages with
+
+        Returns
+        ----------
+        (int): Number of pages indexed
+        """
+
+        started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "generator": "allpages",
+            "gapnamespace": 0,
+            "gapfilterredir": "nonredirects",
+            "gaplimit": CRAWL_BATCH_SIZE,
+            "prop": "revisions",
+            "rvprop": "ids|content",
+            "rvslots": "main",
+        }
+
+        count = 0
+        while True:
+            data = await api.get(params)
+            pages = []
+            for page in data.get("query", {}).get("pages", []):
+                if not (revisions := page.get("revisions")):
+                    continue
+                revision = revisions[0]
+                pages.append((page["pageid"], page["title"], revision["revid"], revision_content(revision)))
+
+            await self.upsert(pages)
+            count += len(pages)
+
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+
+        # Changes made while crawling are picked up by the next poll
+        await self.set_sync_state("recentchanges", started_at)
+        return count
+
+    async def poll_changes(self, api) -> int:
+        """
+        Applies everything that has changed on the wiki since the last poll
+
+        Parameters
+        ----------
+        api (VitebokaAPI): Client to fetch the changes with
+
+        Returns
+        ----------
+        (int): Number of changes applied
+        """
+
+        if not (since := await self.get_sync_state("recentchanges")):
+            return 0
+        # rcstart is inclusive, so the changes of the last poll come back again. They are recognised by their id
+        last_rcid = int(await self.get_sync_state("recentchanges_rcid") or 0)
+
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "list": "recentchanges",
+            "rcnamespace": 0,
+            "rcdir": "newer",
+            "rcstart": since,
+            "rcprop": "title|ids|timestamp|loginfo",
+            "rctype": "edit|new|log",
+            "rclimit": 500,
+        }
+
+        changed = set()
+        deleted = set()
+        latest = since
+        latest_rcid = last_rcid
+        while True:
+            data = await api.get(params)
+            for change in data.get("query", {}).get("recentchanges", []):
+                if change["rcid"] <= last_rcid:
+                    continue
+                latest = max(latest, change["timestamp"])
+                latest_rcid = max(latest_rcid, change["rcid"])
+                if change.get("logtype") == "delete" and change.get("logaction") == "delete":
+                    deleted.add(change["title"])
+                elif change.get("pageid"):
+                    # Moves, undeletions and edits are all handled by fetching the latest revision
+                    changed.add(change["pageid"])
+
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+
+        if deleted:
+            await self.delete(titles=list(deleted))
+        if changed:
+            await self.fetch_pages(api, sorted(changed))
+
+        await self.set_sync_state("recentchanges", latest)
+        await self.set_sync_state("recentchanges_rcid", str(latest_rcid))
+        return len(changed) + len(deleted)
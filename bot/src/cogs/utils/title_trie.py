@@ -0,0 +1,86 @@
+import difflib
+
+
+class TitleTrie:
+    """
+    Prefix index of article titles, for autocomplete. Every word of a title can be completed, not just the first,
+    so "neuf" finds "Chateau Neuf". Falls back to fuzzy matching for typos
+    """
+
+    def __init__(self, titles: list[str] | None = None, max_results: int = 25):
+        """
+        Parameters
+        ----------
+        titles (list[str] | None): Titles to index
+        max_results (int): Max number of titles kept per prefix. Discord shows at most 25 choices
+        """
+
+        self.max_results = max_results
+        self.root = {}
+        self.titles = {}  # lowercase title -> title
+        self.build(titles or [])
+
+    def __len__(self):
+        return len(self.titles)
+
+    def build(self, titles: list[str]):
+        """
+        Replaces the indexed titles. The new trie is built before it's swapped in, so lookups never see half of it
+
+        Parameters
+        ----------
+        titles (list[str]): Titles to index
+        """
+
+        root = {}
+        lowered = {}
+        # Short titles are inserted first, so they're the ones kept when a prefix has too many matches
+        for title in sorted(set(titles), key=lambda title: (len(title), title)):
+            key = title.lower()
+            lowered[key] = title
+
+            words = key.split()
+            for i in range(len(words)):
+                node = root
+                for character in " ".join(words[i:]):
+                    node = node.setdefault(character, {})
+                    matches = node.setdefault("", [])
+                    if len(matches) < self.max_results and title not in matches:
+                        matches.append(title)
+
+        self.root = root
+        self.titles = lowered
+
+    def complete(self, text: str, limit: int = 25) -> list[str]:
+        """
+        Finds titles that start with, or have a word starting with, the given text
+
+        Parameters
+        ----------
+        text (str): What the user has typed so far
+        limit (int): Max number of titles
+
+        Returns
+        ----------
+        (list[str]): Matching titles. Titles starting with the text come first
+        """
+
+        key = " ".join(text.lower().split())
+        if not key:
+            return sorted(self.titles.values())[:limit]
+
+        node = self.root
+        for character in key:
+            if not (node := node.get(character)):
+                break
+        matches = node.get("", []) if node else []
+
+        # Titles starting with the text are more likely what the user wants than titles with a word that does
+        results = sorted(matches, key=lambda title: not title.lower().startswith(key))[:limit]
+
+        if len(results) < limit and len(key) >= 3:
+            for match in difflib.get_close_matches(key, self.titles.keys(), n=limit, cutoff=0.6):
+                if (title := self.titles[match]) not in results:
+                    results.append(title)
+
+        return results[:limit]
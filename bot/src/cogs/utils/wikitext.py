@@ -0,0 +1,269 @@
+import html
+import re
+
+import regex  # The re module doesn't support recursive patterns
+
+# Only the parts of MediaWiki's syntax that Viteboka actually uses are supported.
+# Anything else is passed through as plain text, which is good enough for a 1000 character preview
+
+# Templates (recursively, since they nest), tables, categories and images
+TEMPLATES = regex.compile(
+    r"(?=\{)(\{([^{}]|(?1))*\})|\[\[(Kategori|Fil):.+?\]\]|\{.+?\}", regex.MULTILINE | regex.DOTALL
+)
+HEADING = re.compile(r"^(={1,6})\s*(.+?)\s*\1\s*$")
+LIST_ITEM = re.compile(r"^([*#:;]+)\s*(.*)$")
+HORIZONTAL_RULE = re.compile(r"^-{4,}\s*$")
+APOSTROPHES = re.compile(r"('{2,5})")
+WIKILINK = re.compile(r"\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]")
+EXTERNAL_LINK = re.compile(r"\[((?:https?:)?//[^\s\]]+)(?:\s+([^\]]*))?\]")
+LINE_BREAK = re.compile(r"<br\s*/?>", re.IGNORECASE)
+REFERENCE = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>|<references\s*/>", re.IGNORECASE | re.DOTALL)
+COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+MARKDOWN_SPECIAL = re.compile(r"([\\*_~`|])")
+
+# Namespaces of links that don't make sense as text
+HIDDEN_LINK_NAMESPACES = ("kategori:", "category:", "fil:", "file:", "bilde:", "image:", "media:")
+
+
+def strip_templates(wikitext: str, timeout: float | None = None) -> str:
+    """
+    Removes templates, tables, categories and images
+
+    Parameters
+    ----------
+    wikitext (str): Wikitext straight from the wiki
+    timeout (float | None): Seconds the pattern may run before giving up. No limit if None
+
+    Returns
+    ----------
+    (str): The wikitext without templates
+
+    Raises
+    ----------
+    TimeoutError: If the timeout was reached
+    """
+
+    # concurrent releases the GIL while matching, so the event loop keeps running
+    return TEMPLATES.sub("", wikitext, concurrent=True, timeout=timeout)
+
+
+def plain_text(wikitext: str, limit: int = 1000) -> str:
+    """
+    Crude but cheap extract of the start of an article, for when the proper conversion takes too long.
+    Only looks at a bounded prefix of the article and never backtracks, so it's fast no matter the input
+
+    Parameters
+    ----------
+    wikitext (str): Wikitext straight from the wiki
+    limit (int): Approximate number of characters wanted
+
+    Returns
+    ----------
+    (str): Text without any markup
+    """
+
+    # Skip everything inside curly brackets by keeping track of how deep we are
+    output = []
+    depth = 0
+    for character in wikitext[: limit * 20]:
+        if character == "{":
+            depth += 1
+        elif character == "}":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            output.append(character)
+
+    text = COMMENT.sub("", "".join(output))
+    text = REFERENCE.sub("", text)
+    text = LINE_BREAK.sub("\n", text)
+    text = convert_links(escape_markdown(html.unescape(TAG.sub("", text))))
+    text = APOSTROPHES.sub("", text)
+    text = "\n".join(line.strip("=*#:; ") for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def escape_markdown(text: str) -> str:
+    return MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+def convert_links(text: str) -> str:
+    """
+    Replaces wikilinks with their label and external links with markdown links. Discord can't link to wiki pages
+
+    Parameters
+    ----------
+    text (str): Escaped text of a single line
+
+    Returns
+    ----------
+    (str): The text with links converted
+    """
+
+    def wikilink(match: re.Match) -> str:
+        target, label = match.group(1), match.group(2)
+        if target.strip().lower().startswith(HIDDEN_LINK_NAMESPACES):
+            return ""
+        return label if label is not None else target.lstrip(":")
+
+    def external_link(match: re.Match) -> str:
+        url, label = match.group(1).replace("\\", ""), match.group(2)
+        return f"[{label}]({url})" if label else f"<{url}>"
+
+    text = WIKILINK.sub(wikilink, text)
+    return EXTERNAL_LINK.sub(external_link, text)
+
+
+def convert_emphasis(text: str) -> str:
+    """
+    Converts ''italic'', '''bold''' and '''''both''''' to markdown. Unclosed formatting is closed at the end of the
+    line, the same way MediaWiki does it
+
+    Parameters
+    ----------
+    text (str): Text of a single line
+
+    Returns
+    ----------
+    (str): The text with markdown emphasis
+    """
+
+    bold = italic = False
+    output = []
+    for i, part in enumerate(APOSTROPHES.split(text)):
+        if i % 2 == 0:
+            output.append(part)
+            continue
+
+        # Four apostrophes is an apostrophe followed by bold
+        if len(part) == 4:
+            output.append("'")
+            part = "'''"
+
+        if len(part) == 2:
+            output.append("*")
+            italic = not italic
+        elif len(part) == 3:
+            output.append("**")
+            bold = not bold
+        else:
+            output.append("***")
+            bold, italic = not bold, not italic
+
+    if italic:
+        output.append("*")
+    if bold:
+        output.append("**")
+
+    return "".join(output)
+
+
+def convert_inline(text: str) -> str:
+    text = html.unescape(TAG.sub("", text)).replace("\xa0", " ")
+    return convert_emphasis(convert_links(escape_markdown(text))).strip()
+
+
+def iter_markdown(wikitext: str):
+    """
+    Converts wikitext to Discord markdown one block (paragraph, heading or list item) at a time
+
+    Parameters
+    ----------
+    wikitext (str): Wikitext with templates and tables already removed
+
+    Yields
+    ----------
+    (str): The next block of markdown, ending with the whitespace that separates it from the next one
+    """
+
+    wikitext = COMMENT.sub("", wikitext)
+    wikitext = REFERENCE.sub("", wikitext)
+    wikitext = LINE_BREAK.sub("\n", wikitext)
+
+    paragraph = []
+    ordered_counters = []
+    previous_was_list = False
+
+    for line in wikitext.splitlines():
+        line = line.strip()
+
+        heading = HEADING.match(line)
+        list_item = LIST_ITEM.match(line)
+
+        # Paragraphs end at blank lines and at anything that isn't plain text
+        if paragraph and (not line or heading or list_item or HORIZONTAL_RULE.match(line)):
+            yield " ".join(paragraph) + "\n\n"
+            paragraph = []
+
+        if not list_item and previous_was_list:
+            yield "\n"
+        if not list_item:
+            ordered_counters = []
+        previous_was_list = bool(list_item)
+
+        if not line or HORIZONTAL_RULE.match(line):
+            continue
+
+        if heading:
+            level = len(heading.group(1))
+            text = convert_inline(heading.group(2))
+            # Discord only supports three levels of headings
+            yield f"{'#' * level} {text}\n\n" if level <= 3 else f"**{text}**\n\n"
+            continue
+
+        if list_item:
+            markers, text = list_item.groups()
+            depth = len(markers) - 1
+            # Three spaces is enough for Discord to nest under both "- " and "1. "
+            indent = "   " * depth
+            text = convert_inline(text)
+
+            del ordered_counters[depth + 1 :]
+            while len(ordered_counters) <= depth:
+                ordered_counters.append(0)
+
+            if markers[-1] == "#":
+                ordered_counters[depth] += 1
+                yield f"{indent}{ordered_counters[depth]}. {text}\n"
+            elif markers[-1] == "*":
+                yield f"{indent}- {text}\n"
+            elif markers[-1] == ";":
+                # Definition lists can have the definition on the same line. "; term : definition"
+                term, _, definition = text.partition(" : ")
+                yield f"{indent}**{term.strip()}**\n"
+                if definition:
+                    yield f"{indent}{definition.strip()}\n"
+            else:
+                yield f"{indent}{text}\n"
+            continue
+
+        if text := convert_inline(line):
+            paragraph.append(text)
+
+    if paragraph:
+        yield " ".join(paragraph) + "\n"
+
+
+def to_discord_markdown(wikitext: str, limit: int | None = None) -> str:
+    """
+    Converts wikitext to Discord markdown
+
+    Parameters
+    ----------
+    wikitext (str): Wikitext with templates and tables already removed
+    limit (int | None): Stop converting once this many characters are done. The result can be a bit longer
+
+    Returns
+    ----------
+    (str): Discord markdown
+    """
+
+    blocks = []
+    length = 0
+    for block in iter_markdown(wikitext):
+        blocks.append(block)
+        length += len(block)
+        if limit is not None and length >= limit:
+            break
+
+    return "".join(blocks).strip("\n")
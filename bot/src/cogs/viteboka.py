@@ -1,22 +1,194 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
 import discord
-import pypandoc
-import regex  # This should be redundant as re now supports recursive patterns, but apparently it doesn't
-import requests
 from cogs.utils import embed_templates
+from cogs.utils import wikitext
+from cogs.utils.article_cache import ArticleCache
+from cogs.utils.search_index import SearchIndex
+from cogs.utils.search_index import SearchResult
+from cogs.utils.search_index import revision_content
+from cogs.utils.search_index import snippet
+from cogs.utils.title_trie import TitleTrie
 from discord import app_commands
 from discord.ext import commands
+from discord.ext import tasks
 
 WIKI_BASE_URL = "https://viteboka.studentersamfundet.no"
 API_URL = f"{WIKI_BASE_URL}/w/api.php"
 
+# Characters of article text shown in the embed
+ARTICLE_LENGTH = 1000
+# Max number of sections fetched when the lead section is too short to fill the embed
+MAX_SECTIONS = 3
+# Seconds converting an article may take before the plain text fallback is used instead
+CONVERSION_TIMEOUT = 2
+# Search results fetched before the user picks one. Speculative fetches share one API slot and one conversion worker,
+# so the article the user actually clicks never queues behind them
+PREFETCH_COUNT = 2
+# Random articles kept ready for /viteboka tilfeldig, and how long they may wait before they're considered stale
+RANDOM_BUFFER_SIZE = 3
+RANDOM_ARTICLE_MAX_AGE = 3600
+# Longest wait, in seconds, between attempts at refilling the buffer while the wiki is failing
+RANDOM_RETRY_MAX_DELAY = 300
+
+ARTICLE_NOT_FOUND = (
+    "Fant ingen artikkel med det navnet. Kan hende den finnes, men wiki-søk er balle. De burde tatt søketek"
+)
+
+
+class VitebokaAPI:
+    """Shared HTTP client for Viteboka's API. Reuses connections and limits how hard we hit the wiki"""
+
+    def __init__(self, max_concurrent_requests: int = 4, timeout: float = 10, url: str = API_URL):
+        """
+        Parameters
+        ----------
+        max_concurrent_requests (int): Max number of requests to the wiki at the same time
+        timeout (float): Seconds before a request is given up
+        url (str): URL of the API
+        """
+
+        self.url = url
+        self.max_concurrent_requests = max_concurrent_requests
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.session = None
+
+    async def start(self):
+        """
+        Opens the session. Has to be done from within the event loop
+        """
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrent_requests),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+
+    async def get(self, params: dict) -> dict:
+        """
+        Sends a request to the API
+
+        Parameters
+        ----------
+        params (dict): Query parameters
+
+        Returns
+        ----------
+        (dict): The decoded response
+
+        Raises
+        ----------
+        VitebokaException: If the API couldn't be reached or didn't answer properly
+        """
+
+        async with self.semaphore:
+            try:
+                async with self.session.get(self.url, params=params) as response:
+                    if response.status != 200:
+                        raise VitebokaException("Klarte ikke å nå API")
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                raise VitebokaException("Klarte ikke å nå API")
+
+
+def truncate(text: str) -> str:
+    return text[:ARTICLE_LENGTH] + "..." if len(text) > ARTICLE_LENGTH else text
 
-async def fetch_article(title: str):
+
+def render_text(text: str, timeout: float | None = None, limit: int | None = None) -> str:
+    """
+    Converts the wikitext of an article to Discord markdown
+
+    Parameters
+    ----------
+    text (str): Wikitext straight from the wiki
+    timeout (float | None): Seconds the template stripping may run before giving up. No limit if None
+    limit (int | None): Stop converting once this many characters are done. Everything is converted if None
+
+    Returns
+    ----------
+    (str): Discord markdown
+
+    Raises
+    ----------
+    TimeoutError: If the timeout was reached
+    """
+
+    # Parsing text sucks. Even more so when it's wiki text with no consistencies whatsoever
+    text = wikitext.strip_templates(text, timeout)
+    return wikitext.to_discord_markdown(text, limit)
+
+
+class TextProcessor:
+    """
+    Converts article text in a small pool of worker threads, so a huge or pathological article can't block the event
+    loop. Conversions that take too long are given up in favour of a plain text extract
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = CONVERSION_TIMEOUT):
+        """
+        Parameters
+        ----------
+        max_workers (int): Max number of articles converted at the same time
+        timeout (float): Seconds an article may take, including time spent waiting for a worker
+        """
+
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="viteboka")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, text: str, limit: int = ARTICLE_LENGTH) -> tuple[str, bool]:
+        """
+        Converts the wikitext of an article to Discord markdown
+
+        Parameters
+        ----------
+        text (str): Wikitext straight from the wiki
+        limit (int): Stop converting once this many characters are done
+
+        Returns
+        ----------
+        (tuple[str, bool]): The converted text, and whether it's the full conversion rather than the plain text fallback
+        """
+
+        loop = asyncio.get_running_loop()
+        try:
+            # The regex timeout makes sure the worker is freed up again, as threads can't be killed from the outside
+            future = loop.run_in_executor(self.executor, render_text, text, self.timeout, limit)
+            return await asyncio.wait_for(future, timeout=self.timeout), True
+        except TimeoutError:
+            return wikitext.plain_text(text, limit), False
+
+
+async def fetch_article(
+    api: VitebokaAPI,
+    title: str,
+    cache: ArticleCache | None = None,
+    processor: TextProcessor | None = None,
+    revision: tuple[int, int] | None = None,
+):
     """
     Fetch an article from Viteboka
 
     Parameters
     ----------
+    api (VitebokaAPI): Client to fetch the article with
     title (str): The title of the article to fetch
+    cache (ArticleCache | None): Cache of rendered articles. Skipped if not given
+    processor (TextProcessor | None): Worker pool to convert the text in. Converted on the event loop if not given
+    revision (tuple[int, int] | None): Page id and revision id from the search index, which may be a little behind
+        the wiki. Only used to look for a cached render
 
     Returns
     ----------
@@ -27,39 +199,84 @@ async def fetch_article(title: str):
         "action": "parse",
         "format": "json",
         "page": title,
-        "prop": "text|images|displaytitle|wikitext",
+        "prop": "wikitext|images",
+        # Only the start of the article fits in the embed anyway
+        "section": 0,
     }
 
-    response = requests.get(API_URL, params=params)
-
-    if response.status_code != 200:
-        raise VitebokaException("Klarte ikke å nå API")
-
-    page = response.json()
+    if cache:
+        # Recently looked up titles and search results are answered without asking the wiki at all. A revision the wiki
+        # told us about is trusted over one from the search index, and only the wiki's are remembered
+        if known_revision := cache.get_revision(title):
+            revision = known_revision
+        elif not revision:
+            # Otherwise, ask for the latest revision id. That's a lot cheaper than parsing and converting the article
+            info = await api.get({"action": "query", "format": "json", "titles": title, "prop": "info", "redirects": 1})
+            page = next(iter(info.get("query", {}).get("pages", {}).values()), {})
+            if "pageid" not in page:
+                raise VitebokaException(ARTICLE_NOT_FOUND)
+
+            revision = page["pageid"], page["lastrevid"]
+            cache.set_revision(title, *revision)
+            cache.set_revision(page["title"], *revision)
+
+        if article := await cache.get(*revision):
+            return article
+
+        del params["page"]
+        params["pageid"] = revision[0]
+
+    page = await api.get(params)
     if not (parse := page.get("parse")):
-        raise VitebokaException(
-            "Fant ingen artikkel med det navnet. Kan hende den finnes, men wiki-søk er balle. De burde tatt søketek"
-        )
+        raise VitebokaException(ARTICLE_NOT_FOUND)
 
     title = parse.get("title")
+    if cache:
+        # Parsing by page id gets the latest revision, so this is the wiki's own answer
+        cache.set_revision(title, parse["pageid"], parse["revid"])
     url = f"{WIKI_BASE_URL}/?curid={parse.get('pageid')}"
-    image = f"{WIKI_BASE_URL}/w/images/{parse.get('images')[0]}" if parse.get("images") else None
-    text = parse.get("wikitext")["*"]
-
-    # If you're reading this, know that I'm on my way
-    # to your house right now to erase your memories of ever reading this shit.
-    # Parsing text fucking sucks. Even more so when it's wiki text with no consistencies whatsoever
-    # This is wildly inefficent but I don't. fucking. care. Just make it work
-    text = regex.sub(
-        r"(?=\{)(\{([^{}]|(?1))*\})|\[\[(Kategori|Fil):.+?\]\]|\{.+?\}", "", text, flags=regex.MULTILINE | regex.DOTALL
-    )  # Remove templates, categories and images
-    text = pypandoc.convert_text(text, "markdown", format="mediawiki")
-    text = regex.sub(
-        r"\[(.+?)\]\(.+? \"wikilink\"\)", r"\1", text, flags=regex.MULTILINE | regex.DOTALL
-    )  # Pandoc adds alt text to links. discord doesn't support that
-    text = regex.sub(r"\{.+\}", "", text)  # Pandoc adds section links. Remove them
-    text = text.strip("\n")
-    text = text[:1000] + "..." if len(text) > 1000 else text
+    images = parse.get("images")
+
+    async def render(text: str, limit: int) -> tuple[str, bool]:
+        if processor:
+            return await processor.render(text, limit)
+        return render_text(text, limit=limit), True
+
+    text, complete = await render(parse.get("wikitext")["*"], ARTICLE_LENGTH)
+
+    # Short leads are followed by the next few sections of the same revision, until the embed is filled
+    section = 1
+    for _ in range(1, MAX_SECTIONS):
+        if len(text) >= ARTICLE_LENGTH or not complete:
+            break
+
+        page = await api.get(
+            {
+                "action": "parse",
+                "format": "json",
+                "oldid": parse["revid"],
+                "prop": "wikitext|images",
+                "section": section,
+            }
+        )
+        # MediaWiki answers with an error when there are no more sections
+        if not (next_section := page.get("parse")):
+            break
+
+        # A section comes with its subsections, which are numbered as sections of their own. Skip past them
+        section_wikitext = next_section.get("wikitext")["*"]
+        section += max(sum(1 for line in section_wikitext.split("\n") if wikitext.HEADING.match(line)), 1)
+
+        images = images or next_section.get("images")
+        section_text, complete = await render(section_wikitext, ARTICLE_LENGTH - len(text))
+        text = "\n\n".join(part for part in (text, section_text) if part)
+
+    image = f"{WIKI_BASE_URL}/w/images/{images[0]}" if images else None
+    text = truncate(text)
+
+    # Fallbacks aren't cached, so the article gets another chance next time
+    if cache and complete:
+        await cache.set(parse["pageid"], parse["revid"], (title, url, text, image))
 
     return title, url, text, image
 
@@ -102,6 +319,202 @@ class Viteboka(commands.Cog):
         """
 
         self.bot = bot
+        self.api = VitebokaAPI()
+        self.cache = ArticleCache(bot.db)
+        self.processor = TextProcessor()
+        self.index = SearchIndex(bot.db)
+        self.titles = TitleTrie()
+        self.index_ready = False  # Set by the sync loop once the index has been built
+        self.random_articles = deque()  # (time fetched, article), oldest first
+        self.random_retry_delay = 1
+        self.prefetch_limit = asyncio.Semaphore(1)
+
+    async def cog_load(self):
+        await self.api.start()
+        self.sync_index.start()
+        self.fill_random_articles.start()
+
+    async def cog_unload(self):
+        self.bot.logger.info("Unloading cog")
+        self.sync_index.cancel()
+        self.fill_random_articles.cancel()
+        await self.api.close()
+        self.processor.close()
+
+    async def init_db(self):
+        """
+        Create the necessary tables for the cog to work
+        """
+
+        await self.cache.init_db()
+        await self.index.init_db()
+
+    async def fetch_article(self, title: str, revision: tuple[int, int] | None = None) -> tuple:
+        """
+        Fetch an article from Viteboka through the cog's client and cache
+
+        Parameters
+        ----------
+        title (str): The title of the article to fetch
+        revision (tuple[int, int] | None): Page id and latest revision id, if already known
+
+        Returns
+        ----------
+        tuple: The title, url, text and image of the article
+        """
+
+        return await fetch_article(self.api, title, self.cache, self.processor, revision)
+
+    @tasks.loop(minutes=5)
+    async def sync_index(self):
+        """
+        Keeps the search index and the autocomplete titles in sync with the wiki. The whole wiki is crawled the
+        first time
+        """
+
+        # Any error escaping the loop would stop it for good, so everything is logged and tried again next time
+        try:
+            # Searches check this instead of asking the database every time
+            self.index_ready = await self.index.get_sync_state("recentchanges") is not None
+            if not self.index_ready:
+                self.bot.logger.info("Building Viteboka search index")
+                count = await self.index.crawl(self.api)
+                self.index_ready = True
+                self.bot.logger.info(f"Viteboka search index built with {count} articles")
+            elif changes := await self.index.poll_changes(self.api):
+                self.bot.logger.info(f"Applied {changes} changes from Viteboka to the search index")
+        except VitebokaException as e:
+            self.bot.logger.error(f"Failed to sync Viteboka search index: {e}")
+        except Exception as e:
+            self.bot.logger.error(
+                "Failed to sync Viteboka search index\n"
+                + "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            )
+
+        # Autocomplete has to answer within Discord's deadline, so it only ever looks at this copy of the titles.
+        # Building it takes a moment for a big wiki, so it's done in a thread
+        try:
+            await asyncio.to_thread(self.titles.build, await self.index.titles())
+        except Exception as e:
+            self.bot.logger.error(
+                "Failed to build Viteboka titles\n" + "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            )
+
+    @sync_index.before_loop
+    async def before_sync_index(self):
+        """
+        Make sure bot is ready before starting the index sync loop
+        """
+
+        await self.bot.wait_until_ready()
+
+    async def fetch_random_article(self) -> tuple:
+        """
+        Fetch a random article from Viteboka
+
+        Returns
+        ----------
+        tuple: The title, url, text and image of the article
+
+        Raises
+        ----------
+        VitebokaException: If the wiki couldn't be reached or the article couldn't be fetched
+        """
+
+        params = {
+            "action": "query",
+            "format": "json",
+            "list": "random",
+            "rnnamespace": 0,  # Main namespace
+            "rnlimit": 1,  # Get one random article
+        }
+        data = await self.api.get(params)
+        return await self.fetch_article(data["query"]["random"][0]["title"])
+
+    @tasks.loop(seconds=1)
+    async def fill_random_articles(self):
+        """
+        Keeps a few random articles ready, so /viteboka tilfeldig doesn't have to wait for the wiki
+        """
+
+        # Articles may have been edited since they were fetched
+        while self.random_articles and time.monotonic() - self.random_articles[0][0] > RANDOM_ARTICLE_MAX_AGE:
+            self.random_articles.popleft()
+
+        while len(self.random_articles) < RANDOM_BUFFER_SIZE:
+            try:
+                article = await self.fetch_random_article()
+            except Exception as e:
+                # Anything escaping the loop would stop it for good and leave the buffer empty until a restart
+                if isinstance(e, VitebokaException):
+                    error = str(e)
+                else:
+                    error = "\n" + "".join(traceback.format_exception(type(e), e, e.__traceback__))
+                self.bot.logger.error(
+                    f"Failed to fetch random article for the buffer. Trying again in {self.random_retry_delay} s: "
+                    + error
+                )
+                # Back off while the wiki is down, instead of asking it every second
+                await asyncio.sleep(self.random_retry_delay)
+                self.random_retry_delay = min(self.random_retry_delay * 2, RANDOM_RETRY_MAX_DELAY)
+                return
+
+            self.random_retry_delay = 1
+            self.random_articles.append((time.monotonic(), article))
+
+    @fill_random_articles.before_loop
+    async def before_fill_random_articles(self):
+        """
+        Make sure bot is ready before starting to fill the random article buffer
+        """
+
+        await self.bot.wait_until_ready()
+
+    async def search_articles(self, query: str) -> list[SearchResult]:
+        """
+        Searches for articles. Answered by the local index, or by the wiki until the index has been built
+
+        Parameters
+        ----------
+        query (str): The search query
+
+        Returns
+        ----------
+        (list[SearchResult]): The matching articles, best match first
+
+        Raises
+        ----------
+        VitebokaException: If the wiki couldn't be reached
+        """
+
+        if self.index_ready:
+            return await self.index.search(query)
+
+        # One request gets the hits along with their ids and lead sections, instead of a search and then an info query
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "generator": "search",
+            "gsrsearch": query,
+            "gsrnamespace": 0,
+            "gsrlimit": 5,
+            "prop": "info|revisions",
+            "rvprop": "ids|content",
+            "rvslots": "main",
+            "rvsection": 0,
+        }
+        data = await self.api.get(params)
+        pages = sorted(data.get("query", {}).get("pages", []), key=lambda page: page.get("index", 0))
+        return [
+            SearchResult(
+                page["title"],
+                page["pageid"],
+                page["lastrevid"],
+                snippet(revision_content(page["revisions"][0])) if page.get("revisions") else "",
+            )
+            for page in pages
+        ]
 
     viteboka_group = app_commands.Group(name="viteboka", description="Søk i Viteboka etter informasjon")
 
@@ -120,50 +533,57 @@ class Viteboka(commands.Cog):
 
         await interaction.response.defer()
 
-        params = {
-            "action": "query",
-            "format": "json",
-            "list": "search",
-            "srsearch": søkestreng,
-        }
-        response = requests.get(url=API_URL, params=params)
-        if response.status_code != 200:
-            self.bot.logger.error(f"Failed to search for articles with query {søkestreng}: {response.status_code}")
+        try:
+            search_results = await self.search_articles(søkestreng)
+        except VitebokaException as e:
+            self.bot.logger.error(f"Failed to search for articles with query {søkestreng}: {e}")
             embed = embed_templates.error_fatal("Klarte ikke å søke etter artikler")
             return await interaction.followup.send(embed=embed)
 
-        data = response.json()
-        search_results = data["query"]["search"]
-
         if not search_results:
             self.bot.logger.info(f"No articles found with query {søkestreng}")
             embed = embed_templates.error_warning("Fant ingen artikler som matcher søket")
             return await interaction.followup.send(embed=embed)
 
-        if len(search_results) == 1:
-            title = search_results[0]["title"]
-        else:
-            view = discord.ui.View()
-            for i, result in enumerate(search_results[:5]):
-                view.add_item(ArticleButton(interaction.user, str(i + 1), result["title"]))
+        if len(search_results) > 1:
+            view = SearchResultsView(self, interaction.user, search_results[:5])
 
             embed = discord.Embed(title="Velg en artikkel")
             embed.description = "\n".join(
-                [f"**{i+1}.** {result['title']}" for i, result in enumerate(search_results[:5])]
+                [f"**{i+1}.** {result.title}\n{result.snippet}" for i, result in enumerate(search_results[:5])]
             )
             embed.description += "\n\nFinner du ikke det du leter etter? Synd! Jeg orker ikke å implementere pagination"
             return await interaction.followup.send(embed=embed, view=view)
 
+        result = search_results[0]
         try:
-            title, url, text, image = await fetch_article(søkestreng)
+            title, url, text, image = await self.fetch_article(result.title, (result.page_id, result.revision_id))
         except VitebokaException as e:
-            self.bot.logger.error(f"Failed to fetch article {søkestreng}: {e}")
+            self.bot.logger.error(f"Failed to fetch article {result.title}: {e}")
             embed = embed_templates.error_fatal(str(e))
             return await interaction.followup.send(embed=embed)
 
         embed = viteboka_embed(title, url, text, image)
         await interaction.followup.send(embed=embed)
 
+    @search.autocomplete("søkestreng")
+    async def search_autocomplete(self, interaction: discord.Interaction, current: str):
+        """
+        Suggests article titles while the user types
+
+        Parameters
+        ----------
+        interaction (discord.Interaction): Slash command context object
+        current (str): What the user has typed so far
+
+        Returns
+        ----------
+        (list[app_commands.Choice[str]]): Matching titles
+        """
+
+        # Choices can't be longer than 100 characters
+        return [app_commands.Choice(name=title[:100], value=title[:100]) for title in self.titles.complete(current)]
+
     @app_commands.checks.bot_has_permissions(embed_links=True, attach_files=True)
     @app_commands.checks.cooldown(1, 5)
     @viteboka_group.command(name="tilfeldig", description="Få en tilfeldig artikkel fra Viteboka")
@@ -176,29 +596,19 @@ class Viteboka(commands.Cog):
         interaction (discord.Interaction): Slash command context object
         """
 
-        await interaction.response.defer()
-
-        params = {
-            "action": "query",
-            "format": "json",
-            "list": "random",
-            "rnnamespace": 0,  # Main namespace
-            "rnlimit": 1,  # Get one random article
-        }
-
-        response = requests.get(url=API_URL, params=params)
-        if response.status_code != 200:
-            self.bot.logger.error(f"Failed to fetch random article: {response.status_code}")
-            embed = embed_templates.error_fatal("Klarte ikke å søke etter en tilfeldig artikkel")
-            return await interaction.followup.send(embed=embed)
+        # The buffer is refilled by fill_random_articles, so there's nothing to wait for. No need to defer
+        while self.random_articles:
+            fetched_at, article = self.random_articles.popleft()
+            if time.monotonic() - fetched_at <= RANDOM_ARTICLE_MAX_AGE:
+                return await interaction.response.send_message(embed=viteboka_embed(*article))
 
-        data = response.json()
-        random_article_title = data["query"]["random"][0]["title"]
+        # Only happens if the command is used faster than the buffer is refilled
+        await interaction.response.defer()
 
         try:
-            title, url, text, image = await fetch_article(random_article_title)
+            title, url, text, image = await self.fetch_random_article()
         except VitebokaException as e:
-            self.bot.logger.error(f"Failed to fetch article {random_article_title}: {e}")
+            self.bot.logger.error(f"Failed to fetch random article: {e}")
             embed = embed_templates.error_fatal(str(e))
             return await interaction.followup.send(embed=embed)
 
@@ -206,11 +616,86 @@ class Viteboka(commands.Cog):
         await interaction.followup.send(embed=embed)
 
 
+class SearchResultsView(discord.ui.View):
+    """
+    Buttons for choosing between search results. The articles are fetched in the background while the user decides,
+    so the one they pick is usually ready by the time they click
+    """
+
+    def __init__(self, cog: "Viteboka", owner: discord.User | discord.Member, results: list[SearchResult]):
+        """
+        Parameters
+        -----------
+        cog (Viteboka): The cog the articles are fetched through
+        owner (discord.User|discord.Member): The user that searched. Only this user can use the buttons
+        results (list[SearchResult]): The search results
+        """
+
+        super().__init__()
+        self.cog = cog
+        self.prefetches = {}
+        self.started = set()  # Titles whose prefetch got past the limit and is actually fetching
+
+        for i, result in enumerate(results):
+            self.add_item(ArticleButton(cog, owner, str(i + 1), result.title))
+
+            if i < PREFETCH_COUNT:
+                task = asyncio.create_task(self.prefetch(result))
+                # Failures are dealt with if the article is picked. Until then they shouldn't be logged as unhandled
+                task.add_done_callback(lambda task: task.cancelled() or task.exception())
+                self.prefetches[result.title] = task
+
+    async def prefetch(self, result: SearchResult) -> tuple:
+        async with self.cog.prefetch_limit:
+            self.started.add(result.title)
+            return await self.cog.fetch_article(result.title, (result.page_id, result.revision_id))
+
+    def get_prefetch(self, title: str) -> asyncio.Task | None:
+        """
+        Returns the prefetch of an article, if it's worth waiting for. A prefetch still waiting for its turn is
+        cancelled, since fetching the article right away is faster
+
+        Parameters
+        -----------
+        title (str): Title of the article
+
+        Returns
+        -----------
+        (asyncio.Task | None): The prefetch
+        """
+
+        task = self.prefetches.get(title)
+        if not task or task.cancelled():
+            return None
+        if title not in self.started:
+            task.cancel()
+            return None
+        return task
+
+    def cancel_prefetches(self, keep: str | None = None):
+        """
+        Stops fetching articles nobody is going to look at. A conversion already running in a worker thread can't
+        be stopped, but it's bounded by the processor's timeout
+
+        Parameters
+        -----------
+        keep (str | None): Title of an article that should still be fetched
+        """
+
+        for title, task in self.prefetches.items():
+            if title != keep:
+                task.cancel()
+
+    async def on_timeout(self):
+        self.cancel_prefetches()
+
+
 class ArticleButton(discord.ui.Button):
     """Button for selecting an article from a list of search results"""
 
     def __init__(
         self,
+        cog: "Viteboka",
         owner: discord.User | discord.Member,
         label: str,
         article_title: str,
@@ -218,12 +703,14 @@ class ArticleButton(discord.ui.Button):
         """
         Parameters
         -----------
+        cog (Viteboka): The cog the article is fetched through
         owner (discord.User|discord.Member): The user that invoked the paginator. Only this user can use the button
         label (str): The label of the button
         article_title (str): The title of the article the button is associated with
         """
 
         super().__init__(label=label)
+        self.cog = cog
         self.owner = owner
         self.article_title = article_title
 
@@ -243,8 +730,17 @@ class ArticleButton(discord.ui.Button):
                 "Bare den som skrev kommandoen kan bruke denne knappen", ephemeral=True
             )
 
+        prefetch = None
+        if isinstance(self.view, SearchResultsView):
+            self.view.stop()
+            self.view.cancel_prefetches(keep=self.article_title)
+            prefetch = self.view.get_prefetch(self.article_title)
+
         try:
-            title, url, text, image = await fetch_article(self.article_title)
+            if prefetch:
+                title, url, text, image = await prefetch
+            else:
+                title, url, text, image = await self.cog.fetch_article(self.article_title)
         except VitebokaException as e:
             embed = embed_templates.error_fatal(str(e))
             return await interaction.followup.send(embed=embed)
@@ -262,4 +758,6 @@ async def setup(bot: commands.Bot):
     bot (commands.Bot): Bot instance
     """
 
-    await bot.add_cog(Viteboka(bot))
+    cog = Viteboka(bot)
+    await cog.init_db()
+    await bot.add_cog(cog)
@@ -0,0 +1,200 @@
+"""
+Imports a MediaWiki XML dump of Viteboka into the search index
+
+Much faster than letting the bot crawl the wiki through the API. The dump is streamed, so memory use doesn't grow
+with its size. Create one with maintenance/dumpBackup.php --current on the wiki server, or Special:Export.
+If the import is interrupted, running it again with the same dump continues where it stopped.
+
+Usage: python src/import_viteboka_dump.py viteboka.xml[.gz|.bz2]
+"""
+
+import argparse
+import asyncio
+import bz2
+import gzip
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+
+import asyncpg
+from cogs.utils.search_index import SearchIndex
+from dotenv import load_dotenv
+
+RESUME_STATE = "dump_import"
+
+
+def open_dump(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def local_name(tag: str) -> str:
+    # Every dump version has its own XML namespace. We don't care which one it is
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_pages(file):
+    """
+    Streams the articles of a dump. Elements are thrown away as soon as they're read
+
+    Parameters
+    ----------
+    file (file object): The dump, opened in binary mode
+
+    Yields
+    ----------
+    (tuple[int, str, int, str, str]): Page id, title, revision id, wikitext and revision timestamp of every
+        article in the main namespace. Redirects are skipped
+    """
+
+    context = ElementTree.iterparse(file, events=("start", "end"))
+    _, root = next(context)
+
+    page = None
+    revision = None
+    for event, element in context:
+        tag = local_name(element.tag)
+
+        if event == "start":
+            if tag == "page":
+                page = {}
+            elif tag == "revision":
+                revision = {}
+            continue
+
+        if tag == "page":
+            # With full history the last revision is the latest one
+            if page.get("ns") == "0" and "redirect" not in page and "revision" in page:
+                latest = page["revision"]
+                yield int(page["id"]), page["title"], int(latest["id"]), latest.get("text", ""), latest["timestamp"]
+            page = None
+            root.clear()
+        elif tag == "revision":
+            page["revision"] = revision
+            revision = None
+            element.clear()
+        elif revision is not None and tag in ("id", "timestamp", "text"):
+            # Contributors have ids too, and they come after the revision's own
+            revision.setdefault(tag, element.text or "")
+        elif page is not None and tag in ("id", "ns", "title", "redirect"):
+            page[tag] = element.text or ""
+
+
+async def import_batch(db: asyncpg.Pool, batch: list[tuple]):
+    """
+    Loads a batch of pages with COPY and remembers how far the import got, all in one transaction
+    """
+
+    async with db.acquire() as connection:
+        async with connection.transaction():
+            await connection.execute(
+                """
+                CREATE TEMPORARY TABLE viteboka_pages_import (
+                    page_id BIGINT,
+                    title TEXT,
+                    revision_id BIGINT,
+                    wikitext TEXT
+                ) ON COMMIT DROP;
+                """
+            )
+            await connection.copy_records_to_table(
+                "viteboka_pages_import", records=[page[:4] for page in batch], schema_name="pg_temp"
+            )
+            # COPY can't handle conflicts, so pages already in the index are updated from the temporary table
+            await connection.execute(
+                """
+                INSERT INTO viteboka_pages (page_id, title, revision_id, wikitext)
+                SELECT page_id, title, revision_id, wikitext
+                FROM viteboka_pages_import
+                ON CONFLICT (page_id) DO UPDATE
+                SET title = EXCLUDED.title, revision_id = EXCLUDED.revision_id, wikitext = EXCLUDED.wikitext,
+                    updated_at = (NOW() AT TIME ZONE 'utc')
+                WHERE viteboka_pages.revision_id <= EXCLUDED.revision_id;
+                """
+            )
+            await connection.execute(
+                """
+                INSERT INTO viteboka_sync (name, value)
+                VALUES ($1, $2)
+                ON CONFLICT (name) DO UPDATE
+                SET value = $2;
+                """,
+                RESUME_STATE,
+                str(batch[-1][0]),
+            )
+
+
+async def main(args: argparse.Namespace):
+    credentials = {
+        "host": os.environ["DATABASE_HOST"],
+        "database": os.environ["DATABASE_NAME"],
+        "user": os.environ["DATABASE_USER"],
+        "password": os.environ["DATABASE_PASSWORD"],
+    }
+    db = await asyncpg.create_pool(**credentials, min_size=1, max_size=1)
+    index = SearchIndex(db)
+    await index.init_db()
+
+    # Dumps are sorted by page id, so everything up to the last imported page can be skipped
+    resume_after = 0
+    if not args.restart and (state := await index.get_sync_state(RESUME_STATE)):
+        resume_after = int(state)
+        print(f"Resuming after page id {resume_after}")
+
+    imported = 0
+    skipped = 0
+    latest_timestamp = ""
+    batch = []
+    start = time.perf_counter()
+    last_report = start
+
+    with open_dump(args.dump) as file:
+        for page in iter_pages(file):
+            latest_timestamp = max(latest_timestamp, page[4])
+            if page[0] <= resume_after:
+                skipped += 1
+                continue
+
+            batch.append(page)
+            if len(batch) < args.batch_size:
+                continue
+
+            await import_batch(db, batch)
+            imported += len(batch)
+            batch = []
+
+            if (now := time.perf_counter()) - last_report >= 1:
+                last_report = now
+                print(f"{imported} pages, {imported / (now - start):.0f} pages/s")
+
+        if batch:
+            await import_batch(db, batch)
+            imported += len(batch)
+
+    elapsed = time.perf_counter() - start
+    print(f"Imported {imported} pages in {elapsed:.2f} s ({imported / elapsed:.0f} pages/s)")
+    if skipped:
+        print(f"Skipped {skipped} pages that were already imported")
+
+    # The bot's sync loop takes over from when the dump was made, instead of crawling the whole wiki again
+    if latest_timestamp and await index.get_sync_state("recentchanges") is None:
+        await index.set_sync_state("recentchanges", latest_timestamp)
+        print(f"Search index marked as up to date as of {latest_timestamp}")
+
+    # A finished import starts from the beginning next time
+    await db.execute("DELETE FROM viteboka_sync WHERE name = $1;", RESUME_STATE)
+    await db.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Import a MediaWiki XML dump of Viteboka into the search index")
+    parser.add_argument("dump", help="Path to the dump. Can be gzip or bzip2 compressed")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Pages loaded per transaction")
+    parser.add_argument("--restart", action="store_true", help="Ignore an interrupted import and start over")
+
+    asyncio.run(main(parser.parse_args()))
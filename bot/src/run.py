@@ -3,6 +3,7 @@ from time import time
 
 import asyncpg
 import discord
+from cogs.utils import discord_utils
 from discord.ext import commands
 from dotenv import load_dotenv
 from logger import BotLogger
@@ -54,6 +55,9 @@ class Bot(commands.Bot):
         }
         self.db = await asyncpg.create_pool(**credentials)
 
+        # Buttons of persistent scrollers are handled here, also on messages sent before a restart
+        self.add_dynamic_items(discord_utils.PersistentScrollerButton)
+
         # Load cogs
         cogs = os.listdir("./src/cogs")
         for file in cogs:
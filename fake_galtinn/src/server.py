@@ -0,0 +1,359 @@
+import asyncio
+import os
+import random
+import secrets
+import urllib.parse
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi import Form
+from fastapi import Header
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.responses import RedirectResponse
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+load_dotenv()
+
+USER_COUNT = int(os.environ.get("FAKE_GALTINN_USERS", 1000))
+GROUP_COUNT = int(os.environ.get("FAKE_GALTINN_GROUPS", 50))
+LINKED_RATIO = float(os.environ.get("FAKE_GALTINN_LINKED_RATIO", 0.5))  # Share of users that already have Discord
+PAGE_SIZE = int(os.environ.get("FAKE_GALTINN_PAGE_SIZE", 100))
+LATENCY_MS = float(os.environ.get("FAKE_GALTINN_LATENCY_MS", 0))
+LATENCY_JITTER_MS = float(os.environ.get("FAKE_GALTINN_LATENCY_JITTER_MS", 0))
+ERROR_RATE = float(os.environ.get("FAKE_GALTINN_ERROR_RATE", 0))
+SEED = int(os.environ.get("FAKE_GALTINN_SEED", 42))
+AUTH_TOKEN = os.environ.get("FAKE_GALTINN_AUTH_TOKEN") or None  # Any token is accepted if not set or empty
+
+# Make the ids look like real Discord snowflakes
+DISCORD_ROLE_ID_OFFSET = 900000000000000000
+DISCORD_USER_ID_OFFSET = 800000000000000000
+
+app = FastAPI(title="Fake Galtinn")
+
+
+class DiscordProfileIn(BaseModel):
+    discord_id: int
+    user: int
+
+
+class Store:
+    """Synthetic Galtinn data with indexes for the filters the bot and verification server use"""
+
+    def __init__(self, user_count: int, group_count: int, linked_ratio: float, seed: int):
+        """
+        Parameters
+        ----------
+        user_count (int): Number of users to generate
+        group_count (int): Number of groups to generate
+        linked_ratio (float): Share of users that start out with a Discord profile
+        seed (int): Seed for the random generator, so runs are reproducible
+        """
+
+        rng = random.Random(seed)
+
+        self.groups = {}
+        for group_id in range(1, group_count + 1):
+            # Roughly one in five groups isn't connected to Discord at all
+            profile = None
+            if rng.random() > 0.2:
+                profile = {
+                    "id": group_id,
+                    "posix_name": f"gruppe{group_id}",
+                    "description": f"Gruppe nummer {group_id}",
+                    "type": rng.choice(["association", "committee", "group"]),
+                    "discord_roles": [
+                        {
+                            "id": group_id * 10 + i,
+                            "discord_id": DISCORD_ROLE_ID_OFFSET + group_id * 10 + i,
+                            "description": f"Rolle {i} for gruppe {group_id}",
+                        }
+                        for i in range(rng.randint(0, 2))
+                    ],
+                }
+            self.groups[group_id] = {"id": group_id, "name": f"Gruppe {group_id}", "profile": profile}
+
+        self.users = {}
+        self.profiles = {}
+        self.profiles_by_discord_id = {}
+        for user_id in range(1, user_count + 1):
+            group_ids = rng.sample(sorted(self.groups), k=min(rng.randint(0, 3), len(self.groups)))
+            self.users[user_id] = {
+                "id": user_id,
+                "username": f"bruker{user_id}",
+                "is_volunteer": bool(group_ids) and rng.random() > 0.3,
+                "is_member": rng.random() > 0.2,
+                "group_ids": group_ids,
+            }
+            if rng.random() < linked_ratio:
+                self.link(DISCORD_USER_ID_OFFSET + user_id, user_id)
+
+        # Users handed out by the authorize endpoint when no user is asked for. A dict works as an ordered set
+        self.unlinked = {user_id: None for user_id in self.users if user_id not in self.profiles}
+        self.codes = {}
+        self.tokens = {}
+
+    def link(self, discord_id: int, user_id: int) -> dict:
+        # A user can only have one profile, so the profile simply shares the user's id
+        profile = {"id": user_id, "discord_id": discord_id, "user": user_id}
+        self.profiles[user_id] = profile
+        self.profiles_by_discord_id[discord_id] = profile
+        return profile
+
+    def unlink(self, profile_id: int) -> bool:
+        if not (profile := self.profiles.pop(profile_id, None)):
+            return False
+        del self.profiles_by_discord_id[profile["discord_id"]]
+        self.unlinked[profile["user"]] = None
+        return True
+
+    def serialize_user(self, user: dict) -> dict:
+        return {
+            "id": user["id"],
+            "username": user["username"],
+            "is_volunteer": user["is_volunteer"],
+            "is_member": user["is_member"],
+            "groups": [self.groups[group_id] for group_id in user["group_ids"]],
+            "discord_profile": self.profiles.get(user["id"]),
+        }
+
+
+store = Store(USER_COUNT, GROUP_COUNT, LINKED_RATIO, SEED)
+
+
+def paginate(request: Request, results: list, page: int, page_size: int | None) -> dict:
+    """
+    Paginates results the same way Galtinn (Django REST framework) does
+
+    Parameters
+    ----------
+    request (Request): The incoming request, used to build the next and previous links
+    results (list): All matching results
+    page (int): The requested page, starting at 1
+    page_size (int | None): Results per page. Defaults to FAKE_GALTINN_PAGE_SIZE
+
+    Returns
+    ----------
+    (dict): The page in Galtinn's format
+    """
+
+    page_size = page_size or PAGE_SIZE
+    start = (page - 1) * page_size
+
+    def page_url(number: int) -> str:
+        params = dict(request.query_params)
+        params["page"] = number
+        return f"{str(request.url).split('?')[0]}?{urllib.parse.urlencode(params)}"
+
+    return {
+        "count": len(results),
+        "next": page_url(page + 1) if start + page_size < len(results) else None,
+        "previous": page_url(page - 1) if page > 1 else None,
+        "results": results[start : start + page_size],
+    }
+
+
+def not_found() -> JSONResponse:
+    return JSONResponse({"detail": "Invalid page."}, status_code=404)
+
+
+def authorized(authorization: str | None) -> bool:
+    if not authorization or not authorization.startswith("Token "):
+        return False
+    return AUTH_TOKEN is None or authorization.removeprefix("Token ") == AUTH_TOKEN
+
+
+@app.middleware("http")
+async def simulate_network(request: Request, call_next):
+    """
+    Adds the configured latency and failure rate to every request
+    """
+
+    if LATENCY_MS or LATENCY_JITTER_MS:
+        delay = LATENCY_MS + random.uniform(-LATENCY_JITTER_MS, LATENCY_JITTER_MS)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return JSONResponse({"detail": "Simulated failure"}, status_code=503)
+
+    return await call_next(request)
+
+
+@app.get("/")
+async def index():
+    return {"users": f"{app.root_path}/users/", "groups": f"{app.root_path}/groups/"}
+
+
+@app.get("/users/")
+async def users(
+    request: Request,
+    page: int = 1,
+    page_size: int | None = None,
+    id: int | None = None,
+    no_discord_id: bool | None = None,
+    discord_profile__discord_id: int | None = None,
+    authorization: str | None = Header(default=None),
+):
+    if not authorized(authorization):
+        return JSONResponse({"detail": "Authentication credentials were not provided."}, status_code=401)
+
+    if discord_profile__discord_id is not None:
+        profile = store.profiles_by_discord_id.get(discord_profile__discord_id)
+        candidates = [store.users[profile["user"]]] if profile else []
+    elif id is not None:
+        candidates = [store.users[id]] if id in store.users else []
+    else:
+        candidates = store.users.values()
+
+    if id is not None:
+        candidates = [user for user in candidates if user["id"] == id]
+    if no_discord_id is not None:
+        candidates = [user for user in candidates if (user["id"] not in store.profiles) == no_discord_id]
+
+    results = [store.serialize_user(user) for user in candidates]
+    if page < 1 or (page > 1 and (page - 1) * (page_size or PAGE_SIZE) >= len(results)):
+        return not_found()
+
+    return paginate(request, results, page, page_size)
+
+
+@app.get("/groups/")
+async def groups(
+    request: Request,
+    page: int = 1,
+    page_size: int | None = None,
+    no_discord_roles: bool | None = None,
+    authorization: str | None = Header(default=None),
+):
+    if not authorized(authorization):
+        return JSONResponse({"detail": "Authentication credentials were not provided."}, status_code=401)
+
+    results = list(store.groups.values())
+    if no_discord_roles is not None:
+        results = [
+            group
+            for group in results
+            if (not group["profile"] or not group["profile"]["discord_roles"]) == no_discord_roles
+        ]
+
+    if page < 1 or (page > 1 and (page - 1) * (page_size or PAGE_SIZE) >= len(results)):
+        return not_found()
+
+    return paginate(request, results, page, page_size)
+
+
+@app.get("/discordprofiles/")
+async def discord_profiles(
+    request: Request,
+    page: int = 1,
+    page_size: int | None = None,
+    discord_id: int | None = None,
+    user: int | None = None,
+    authorization: str | None = Header(default=None),
+):
+    if not authorized(authorization):
+        return JSONResponse({"detail": "Authentication credentials were not provided."}, status_code=401)
+
+    if discord_id is not None:
+        results = [store.profiles_by_discord_id[discord_id]] if discord_id in store.profiles_by_discord_id else []
+    elif user is not None:
+        results = [store.profiles[user]] if user in store.profiles else []
+    else:
+        results = list(store.profiles.values())
+
+    if user is not None:
+        results = [profile for profile in results if profile["user"] == user]
+
+    if page < 1 or (page > 1 and (page - 1) * (page_size or PAGE_SIZE) >= len(results)):
+        return not_found()
+
+    return paginate(request, results, page, page_size)
+
+
+@app.post("/discordprofiles/", status_code=201)
+async def create_discord_profile(profile: DiscordProfileIn, authorization: str | None = Header(default=None)):
+    if not authorized(authorization):
+        return JSONResponse({"detail": "Authentication credentials were not provided."}, status_code=401)
+    if profile.user not in store.users:
+        return JSONResponse({"user": ["Invalid pk - object does not exist."]}, status_code=400)
+    if profile.user in store.profiles or profile.discord_id in store.profiles_by_discord_id:
+        return JSONResponse({"discord_id": ["discord profile with this discord id already exists."]}, status_code=400)
+
+    store.unlinked.pop(profile.user, None)
+    return store.link(profile.discord_id, profile.user)
+
+
+@app.delete("/discordprofiles/{profile_id}/")
+async def delete_discord_profile(profile_id: int, authorization: str | None = Header(default=None)):
+    if not authorized(authorization):
+        return JSONResponse({"detail": "Authentication credentials were not provided."}, status_code=401)
+    if not store.unlink(profile_id):
+        return JSONResponse({"detail": "Not found."}, status_code=404)
+
+    return Response(status_code=204)
+
+
+@app.get("/oauth/authorize/")
+async def authorize(
+    redirect_uri: str,
+    state: str,
+    code_challenge: str,
+    client_id: str | None = None,
+    response_type: str = "code",
+    scope: str | None = None,
+    user: int | None = None,
+):
+    """
+    Skips the login page and approves the request right away. The user can be chosen with the `user` parameter,
+    otherwise the next user without a Discord profile is used
+    """
+
+    if user is None:
+        if not store.unlinked:
+            return JSONResponse({"detail": "No users without a Discord profile left"}, status_code=400)
+        # Move the user to the back so concurrent verifications get different users
+        user = next(iter(store.unlinked))
+        store.unlinked.pop(user)
+        store.unlinked[user] = None
+    elif user not in store.users:
+        return JSONResponse({"detail": "Unknown user"}, status_code=400)
+
+    code = secrets.token_urlsafe(16)
+    store.codes[code] = {"user": user, "challenge": code_challenge, "redirect_uri": redirect_uri}
+
+    separator = "&" if "?" in redirect_uri else "?"
+    return RedirectResponse(f"{redirect_uri}{separator}{urllib.parse.urlencode({'code': code, 'state': state})}")
+
+
+@app.post("/oauth/token/")
+async def token(
+    code: str = Form(),
+    code_verifier: str = Form(),
+    grant_type: str = Form(),
+    redirect_uri: str | None = Form(default=None),
+    client_id: str | None = Form(default=None),
+):
+    if grant_type != "authorization_code" or not (grant := store.codes.pop(code, None)):
+        return JSONResponse({"error": "invalid_grant"}, status_code=400)
+    if grant["challenge"] != code_verifier:
+        return JSONResponse({"error": "invalid_grant", "error_description": "Code verifier mismatch"}, status_code=400)
+
+    access_token = secrets.token_urlsafe(24)
+    store.tokens[access_token] = grant["user"]
+
+    return {"access_token": access_token, "token_type": "Bearer", "expires_in": 36000, "scope": "openid profile email"}
+
+
+@app.get("/oauth/userinfo/")
+async def userinfo(authorization: str | None = Header(default=None)):
+    if not authorization or not (user_id := store.tokens.get(authorization.removeprefix("Bearer "))):
+        return JSONResponse({"error": "invalid_token"}, status_code=401)
+
+    user = store.users[user_id]
+    return {
+        "sub": str(user["id"]),
+        "preferred_username": user["username"],
+        "name": f"Bruker {user['id']}",
+        "email": f"{user['username']}@example.com",
+    }
@@ -0,0 +1,69 @@
+import urllib.parse
+
+import pytest
+from fastapi.testclient import TestClient
+from src import server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Small data set with every user unlinked, so the pool is easy to use up
+    monkeypatch.setattr(server, "store", server.Store(user_count=3, group_count=1, linked_ratio=0, seed=1))
+    monkeypatch.setattr(server, "AUTH_TOKEN", None)
+    monkeypatch.setattr(server, "LATENCY_MS", 0)
+    monkeypatch.setattr(server, "LATENCY_JITTER_MS", 0)
+    monkeypatch.setattr(server, "ERROR_RATE", 0)
+    return TestClient(server.app)
+
+
+def authorize(client: TestClient, **params) -> dict:
+    response = client.get(
+        "/oauth/authorize/",
+        params={"redirect_uri": "http://example.com/callback", "state": "s", "code_challenge": "c", **params},
+        follow_redirects=False,
+    )
+    assert response.status_code == 307, response.text
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(response.headers["location"]).query)
+    return server.store.codes[query["code"][0]]
+
+
+def link(client: TestClient, user: int):
+    response = client.post(
+        "/discordprofiles/",
+        json={"discord_id": server.DISCORD_USER_ID_OFFSET + user, "user": user},
+        headers={"Authorization": "Token test"},
+    )
+    assert response.status_code == 201, response.text
+
+
+def test_authorize_rotates_unlinked_users(client):
+    assert [authorize(client)["user"] for _ in range(5)] == [1, 2, 3, 1, 2]
+    assert list(server.store.unlinked) == [3, 1, 2]
+
+
+def test_authorize_fails_when_every_user_is_linked(client):
+    for _ in range(3):
+        link(client, authorize(client)["user"])
+
+    assert not server.store.unlinked
+    response = client.get(
+        "/oauth/authorize/",
+        params={"redirect_uri": "http://example.com/callback", "state": "s", "code_challenge": "c"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "No users without a Discord profile left"}
+
+
+def test_code_gives_userinfo_of_the_handed_out_user(client):
+    user = authorize(client)["user"]
+    code = next(iter(server.store.codes))
+
+    response = client.post(
+        "/oauth/token/", data={"code": code, "code_verifier": "c", "grant_type": "authorization_code"}
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.get("/oauth/userinfo/", headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+    assert response.status_code == 200, response.text
+    assert response.json()["sub"] == str(user)
@@ -0,0 +1,247 @@
+import json
+import os
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Every uvicorn worker keeps its own metrics. With a shared directory set, every worker writes them there and a
+# scrape, answered by any one worker, adds up the metrics of all of them
+METRICS_DIR = os.environ.get("METRICS_DIR")
+WORKER = str(os.getpid())
+# A restarted worker may get the pid of a dead one, so the file name has to be unique as well
+SNAPSHOT_NAME = f"{WORKER}-{uuid.uuid4().hex[:8]}.json"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    """
+    Formats labels the way Prometheus' text format wants them
+
+    Parameters
+    ----------
+    labels (dict[str, str]): Label names and values
+
+    Returns
+    ----------
+    (str): The labels wrapped in curly brackets. Empty if there are no labels
+    """
+
+    if not labels:
+        return ""
+
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+
+    return "{" + ",".join(escaped) + "}"
+
+
+def label_key(labels: dict[str, str]) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def worker_alive(snapshot_name: str) -> bool:
+    pid = int(snapshot_name.split("-", 1)[0])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Counter:
+    """Monotonically increasing counter with labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        """
+        Parameters
+        ----------
+        name (str): Metric name
+        description (str): Help text shown by Prometheus
+        """
+
+        self.name = name
+        self.description = description
+        self.values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str):
+        self.values[label_key(labels)] += amount
+
+    def samples(self) -> list:
+        return [[list(key), value] for key, value in self.values.items()]
+
+
+class Gauge:
+    """Value that is read from a callback every time the metrics are collected"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, callback: callable):
+        """
+        Parameters
+        ----------
+        name (str): Metric name
+        description (str): Help text shown by Prometheus
+        callback (callable): Returns a list of (labels, value) tuples
+        """
+
+        self.name = name
+        self.description = description
+        self.callback = callback
+
+    def samples(self) -> list:
+        return [[list(label_key(labels)), value] for labels, value in self.callback()]
+
+
+class Histogram:
+    """Latency histogram with labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Parameters
+        ----------
+        name (str): Metric name
+        description (str): Help text shown by Prometheus
+        buckets (tuple[float, ...]): Upper bounds of the buckets, in seconds
+        """
+
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.counts: dict[tuple, list[int]] = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self.sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels: str):
+        key = label_key(labels)
+        self.counts[key][bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """
+        Times the body of a with statement. Failed attempts are timed as well
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list:
+        return [[list(key), [list(counts), self.sums[key]]] for key, counts in self.counts.items()]
+
+
+class Registry:
+    """
+    Collection of metrics that can be rendered in Prometheus' text format
+
+    Counters and histograms are added up over every worker that has written to the shared directory, also workers
+    that have since stopped, so they never go backwards. Gauges are only shown for running workers, labelled with
+    the worker's pid
+    """
+
+    def __init__(self, directory: str | None = METRICS_DIR):
+        """
+        Parameters
+        ----------
+        directory (str|None): Directory shared by the workers. None to only show this worker's metrics
+        """
+
+        self.directory = directory
+        self.metrics = []
+
+    def register(self, metric: Counter | Gauge | Histogram):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        return {
+            metric.name: {
+                "kind": metric.kind,
+                "description": metric.description,
+                "buckets": list(getattr(metric, "buckets", [])),
+                "samples": metric.samples(),
+            }
+            for metric in self.metrics
+        }
+
+    def write_snapshot(self):
+        """
+        Writes this worker's metrics to the shared directory. Replaced in one go, so readers never see half a file
+        """
+
+        if not self.directory:
+            return
+
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f"{path}.tmp", path)
+
+    def read_snapshots(self) -> list[tuple[str, dict]]:
+        if not self.directory:
+            return [(SNAPSHOT_NAME, self.snapshot())]
+
+        self.write_snapshot()
+        snapshots = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                    snapshots.append((name, json.load(file)))
+            except (OSError, ValueError):
+                # Removed or replaced while we were reading it
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        merged = {}
+        for snapshot_name, snapshot in self.read_snapshots():
+            alive = snapshot_name == SNAPSHOT_NAME or worker_alive(snapshot_name)
+            worker = snapshot_name.split("-", 1)[0]
+
+            for name, metric in snapshot.items():
+                entry = merged.setdefault(name, {**metric, "values": {}})
+                values = entry["values"]
+                for labels, value in metric["samples"]:
+                    key = tuple(map(tuple, labels))
+                    if metric["kind"] == "gauge":
+                        if alive:
+                            values[(("worker", worker), *key)] = value
+                    elif metric["kind"] == "histogram":
+                        counts, total = values.get(key, ([0] * len(value[0]), 0))
+                        values[key] = ([a + b for a, b in zip(counts, value[0])], total + value[1])
+                    else:
+                        values[key] = values.get(key, 0) + value
+
+        lines = []
+        for name, entry in merged.items():
+            lines.append(f"# HELP {name} {entry['description']}")
+            lines.append(f"# TYPE {name} {entry['kind']}")
+            for key, value in entry["values"].items():
+                labels = dict(key)
+                if entry["kind"] != "histogram":
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+                    continue
+
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip((*entry["buckets"], "+Inf"), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
@@ -1,19 +1,31 @@
+import asyncio
 import os
+import time
+from functools import lru_cache
 
 import aiohttp
 import asyncpg
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi import Request
+from fastapi.responses import HTMLResponse
+from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from src import metrics
+from src.static_assets import StaticAssets
 
 app = FastAPI()
+app.state.health = {
+    "database": {"ok": False, "checked_at": None, "latency": None},
+    "galtinn": {"ok": False, "checked_at": None, "latency": None},
+}
 
 # HTML templates to serve prettier feedback to the user
-app.mount("/static", StaticFiles(directory="src/static"), name="static")
+static_assets = StaticAssets(directory="src/static")
 templates = Jinja2Templates(directory="src/templates")
+templates.env.globals["static_url"] = static_assets.url
 
 
 load_dotenv()
@@ -23,6 +35,49 @@ GALTIINN_CLIENT_ID = os.environ["GALTINN_CLIENT_ID"]
 GALTINN_REDIRECT_URI = os.environ["GALTINN_REDIRECT_URI"]
 GALTINN_AUTH_TOKEN = os.environ["GALTINN_AUTH_TOKEN"]
 
+# Each uvicorn worker gets its own pool, so the total number of connections is workers * max size
+DATABASE_POOL_MIN_SIZE = int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2))
+DATABASE_POOL_MAX_SIZE = int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10))
+GALTINN_MAX_CONNECTIONS = int(os.environ.get("GALTINN_MAX_CONNECTIONS", 20))
+GALTINN_TIMEOUT = float(os.environ.get("GALTINN_TIMEOUT", 10))
+
+# Dependencies are checked in the background so the health endpoints never wait on them
+HEALTH_CHECK_INTERVAL = float(os.environ.get("HEALTH_CHECK_INTERVAL", 10))
+HEALTH_CHECK_TIMEOUT = float(os.environ.get("HEALTH_CHECK_TIMEOUT", 3))
+
+# How often every worker writes its metrics to METRICS_DIR, so the worker answering a scrape can add them up
+METRICS_WRITE_INTERVAL = float(os.environ.get("METRICS_WRITE_INTERVAL", 5))
+
+registry = metrics.Registry()
+CALLBACK_STAGE_LATENCY = registry.register(
+    metrics.Histogram("verification_callback_stage_seconds", "Time spent in each stage of the OAuth2 callback")
+)
+CALLBACK_LATENCY = registry.register(
+    metrics.Histogram("verification_callback_seconds", "Total time spent handling the OAuth2 callback")
+)
+CALLBACKS = registry.register(metrics.Counter("verification_callbacks_total", "Handled callbacks by outcome"))
+ERRORS = registry.register(metrics.Counter("verification_errors_total", "Unhandled exceptions by type"))
+registry.register(
+    metrics.Gauge(
+        "verification_db_pool_connections",
+        "Connections in each worker's database pool by state",
+        lambda: [
+            ({"state": "in_use"}, app.state.pool.get_size() - app.state.pool.get_idle_size()),
+            ({"state": "idle"}, app.state.pool.get_idle_size()),
+            ({"state": "max"}, app.state.pool.get_max_size()),
+        ]
+        if hasattr(app.state, "pool")
+        else [],
+    )
+)
+registry.register(
+    metrics.Gauge(
+        "verification_dependency_up",
+        "Whether the last background check of a dependency succeeded",
+        lambda: [({"dependency": name}, int(check["ok"])) for name, check in app.state.health.items()],
+    )
+)
+
 
 @app.on_event("startup")
 async def startup():
@@ -32,37 +87,159 @@ async def startup():
         "user": os.environ["DATABASE_USER"],
         "password": os.environ["DATABASE_PASSWORD"],
     }
-    app.state.pool = await asyncpg.create_pool(**credentials)
+    app.state.pool = await asyncpg.create_pool(
+        **credentials, min_size=DATABASE_POOL_MIN_SIZE, max_size=DATABASE_POOL_MAX_SIZE
+    )
+
+    # Warm up the pool so the first requests after a deploy don't pay for connection setup
+    async def warm_up():
+        async with app.state.pool.acquire() as conn:
+            await conn.execute("SELECT 1")
+
+    await asyncio.gather(*[warm_up() for _ in range(DATABASE_POOL_MIN_SIZE)])
+
+    # One session for the whole worker so connections to Galtinn are reused between callbacks
+    app.state.session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=GALTINN_MAX_CONNECTIONS),
+        timeout=aiohttp.ClientTimeout(total=GALTINN_TIMEOUT),
+    )
+
+    app.state.health_task = asyncio.create_task(check_health())
+    app.state.metrics_task = asyncio.create_task(write_metrics())
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    # Uvicorn stops accepting connections and lets in-flight requests finish before this runs
+    app.state.health_task.cancel()
+    app.state.metrics_task.cancel()
+    # Counters of a stopped worker are still counted, so its last values have to be written
+    registry.write_snapshot()
+    await app.state.session.close()
     await app.state.pool.close()
 
 
+@lru_cache(maxsize=64)
+def render_error_page(message: str) -> str:
+    """
+    Renders the error page. There's only a handful of different messages, so they're all rendered once
+    """
+
+    return templates.get_template("error.html").render(message=message)
+
+
+@lru_cache(maxsize=1024)
+def render_success_page(name: str) -> str:
+    """
+    Renders the success page for a user. Cached in case they reload it
+    """
+
+    return templates.get_template("success.html").render(name=name)
+
+
+def error_response(message: str, reason: str) -> HTMLResponse:
+    CALLBACKS.inc(outcome=reason)
+    return HTMLResponse(render_error_page(message))
+
+
+async def check_health():
+    """
+    Periodically checks the database and Galtinn and stores the results for the health endpoints
+    """
+
+    async def check_database():
+        async with app.state.pool.acquire(timeout=HEALTH_CHECK_TIMEOUT) as conn:
+            await conn.execute("SELECT 1", timeout=HEALTH_CHECK_TIMEOUT)
+
+    async def check_galtinn():
+        async with app.state.session.get(
+            f"{GALTINN_API_URL}/", timeout=aiohttp.ClientTimeout(total=HEALTH_CHECK_TIMEOUT)
+        ) as r:
+            # Any answer that isn't a server error means Galtinn is up, even if it wants us to authenticate
+            if r.status >= 500:
+                raise aiohttp.ClientResponseError(r.request_info, r.history, status=r.status)
+
+    checks = {"database": check_database, "galtinn": check_galtinn}
+    while True:
+        for name, check in checks.items():
+            start = time.perf_counter()
+            try:
+                await check()
+            except Exception as e:
+                ERRORS.inc(type=f"health_{name}_{type(e).__name__}")
+                ok = False
+            else:
+                ok = True
+            app.state.health[name] = {"ok": ok, "checked_at": time.time(), "latency": time.perf_counter() - start}
+
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+
+async def write_metrics():
+    while True:
+        registry.write_snapshot()
+        await asyncio.sleep(METRICS_WRITE_INTERVAL)
+
+
+@app.middleware("http")
+async def count_errors(request: Request, call_next):
+    try:
+        return await call_next(request)
+    except Exception as e:
+        ERRORS.inc(type=type(e).__name__)
+        raise
+
+
+@app.get("/healthz")
+async def healthz():
+    # The process is alive as long as it can answer. The dependency checks are included for information
+    return {"status": "ok", "checks": app.state.health}
+
+
+@app.get("/readyz")
+async def readyz():
+    now = time.time()
+    ready = all(
+        check["ok"] and now - check["checked_at"] < HEALTH_CHECK_INTERVAL * 3 for check in app.state.health.values()
+    )
+    return JSONResponse(
+        {"status": "ok" if ready else "unavailable", "checks": app.state.health}, status_code=200 if ready else 503
+    )
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/static/{path:path}")
+async def static(request: Request, path: str):
+    return static_assets.response(request, path)
+
+
 @app.get("/")
 async def index():
     return "Hei du! Her skal ikke du drive å luske!"
 
 
 @app.get("/callback")
-async def callback(request: Request, code: str, state: str):
+async def callback(code: str, state: str):
+    with CALLBACK_LATENCY.time():
+        return await handle_callback(code, state)
+
+
+async def handle_callback(code: str, state: str):
     # Check if user is pending verification
-    verification = await app.state.pool.fetchrow(
-        """
-        SELECT discord_id, challenge, state
-        FROM galtinn_verification WHERE state = $1
-        """,
-        state,
-    )
-    if not verification:
-        return templates.TemplateResponse(
-            "error.html",
-            {
-                "request": request,
-                "message": "Denne lenken er utløpt eller ugyldig! Prøv igjen fra start!",
-            },
+    with CALLBACK_STAGE_LATENCY.time(stage="state_lookup"):
+        verification = await app.state.pool.fetchrow(
+            """
+            SELECT discord_id, challenge, state
+            FROM galtinn_verification WHERE state = $1
+            """,
+            state,
         )
+    if not verification:
+        return error_response("Denne lenken er utløpt eller ugyldig! Prøv igjen fra start!", "invalid_state")
 
     discord_id, code_challenge, state = list(verification.values())
 
@@ -74,67 +251,52 @@ async def callback(request: Request, code: str, state: str):
         "redirect_uri": GALTINN_REDIRECT_URI,
         "code_verifier": code_challenge,
     }
-    async with aiohttp.ClientSession() as session:
+    session = app.state.session
+    with CALLBACK_STAGE_LATENCY.time(stage="token_exchange"):
         async with session.post(f"{GALTINN_API_URL}/oauth/token/", data=payload) as r:
             if r.status != 200:
-                return templates.TemplateResponse(
-                    "error.html",
-                    {
-                        "request": request,
-                        "message": "Kunne ikke hente hente autentiseringsnøkkel fra Galtinn!",
-                    },
-                )
+                return error_response("Kunne ikke hente hente autentiseringsnøkkel fra Galtinn!", "token_exchange")
             token_data = await r.json()
 
     # Get user info from galtinn
-    async with aiohttp.ClientSession() as session:
+    with CALLBACK_STAGE_LATENCY.time(stage="userinfo"):
         async with session.get(
             f"{GALTINN_API_URL}/oauth/userinfo/",
             headers={"Authorization": f"Bearer {token_data['access_token']}"},
         ) as r:
             if r.status != 200:
-                return templates.TemplateResponse(
-                    "error.html",
-                    {
-                        "request": request,
-                        "message": "Kunne ikke hente hente brukerinfo fra Galtinn!",
-                    },
-                )
+                return error_response("Kunne ikke hente hente brukerinfo fra Galtinn!", "userinfo")
             user = await r.json()
 
     # Enter discord user into galtinn
-    async with aiohttp.ClientSession() as session:
+    with CALLBACK_STAGE_LATENCY.time(stage="profile_write"):
         async with session.post(
             f"{GALTINN_API_URL}/discordprofiles/",
             json={"discord_id": discord_id, "user": user["sub"]},
             headers={"Authorization": f"Token {GALTINN_AUTH_TOKEN}"},
         ) as r:
             if r.status != 200 and r.status != 201:
-                return templates.TemplateResponse(
-                    "error.html",
-                    {
-                        "request": request,
-                        "message": "Klarte ikke å skrive Discord id til Galtinn!",
-                    },
-                )
-
-    # Delete verification entry
-    await app.state.pool.execute(
-        """
-        DELETE FROM galtinn_verification
-        WHERE discord_id = $1
-        """,
-        discord_id,
-    )
+                return error_response("Klarte ikke å skrive Discord id til Galtinn!", "profile_write")
+
+    with CALLBACK_STAGE_LATENCY.time(stage="notify"):
+        # Delete verification entry
+        await app.state.pool.execute(
+            """
+            DELETE FROM galtinn_verification
+            WHERE discord_id = $1
+            """,
+            discord_id,
+        )
 
-    # Notify bot that user is verified
-    # asyncpg does not allow for arguments in NOTIFY queries, hence we use f-strings
-    notify_query = f"NOTIFY galtinn_auth_complete, '{discord_id} {user['sub']}'"
-    await app.state.pool.execute(notify_query)
+        # Notify bot that user is verified
+        # asyncpg does not allow for arguments in NOTIFY queries, hence we use f-strings
+        notify_query = f"NOTIFY galtinn_auth_complete, '{discord_id} {user['sub']}'"
+        await app.state.pool.execute(notify_query)
 
+    CALLBACKS.inc(outcome="success")
     return RedirectResponse(f"/success/{user['preferred_username']}", status_code=303)
 
 
 @app.get("/success/{name}")
-async def success(request: Request, name: str):
-    return templates.TemplateResponse("success.html", {"request": request, "name": name})
+async def success(name: str):
+    return HTMLResponse(render_success_page(name))
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass
+from dataclasses import field
+
+from fastapi import Request
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional. We just serve gzip without it
+    brotli = None
+
+# Fingerprinted URLs change whenever the file does, so browsers can keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Plain URLs may change between deploys and have to be revalidated with the ETag
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# Images are already compressed and don't get any smaller
+COMPRESSIBLE_TYPES = {"text/css", "text/html", "text/javascript", "text/plain", "image/svg+xml", "application/json"}
+
+
+@dataclass
+class StaticAsset:
+    """A static file kept in memory together with its precompressed variants"""
+
+    content: bytes
+    media_type: str
+    etag: str
+    fingerprinted_name: str
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+class StaticAssets:
+    """Serves the static directory from memory with fingerprinted URLs, ETags and precompressed variants"""
+
+    def __init__(self, directory: str, mount_path: str = "/static"):
+        """
+        Parameters
+        ----------
+        directory (str): Directory containing the static files
+        mount_path (str): Path the files are served under
+        """
+
+        self.mount_path = mount_path
+        self.assets: dict[str, StaticAsset] = {}
+        self.fingerprints: dict[str, str] = {}
+
+        for root, _, files in os.walk(directory):
+            for file in files:
+                path = os.path.relpath(os.path.join(root, file), directory).replace(os.sep, "/")
+                with open(os.path.join(root, file), "rb") as f:
+                    self.add(path, f.read())
+
+    def add(self, path: str, content: bytes):
+        """
+        Fingerprints and precompresses a file and adds it to the store
+
+        Parameters
+        ----------
+        path (str): Path of the file relative to the static directory
+        content (bytes): The file's content
+        """
+
+        digest = hashlib.sha256(content).hexdigest()
+        stem, extension = os.path.splitext(path)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        asset = StaticAsset(
+            content=content,
+            media_type=media_type,
+            etag=f'"{digest[:32]}"',
+            fingerprinted_name=f"{stem}.{digest[:12]}{extension}",
+        )
+
+        if media_type in COMPRESSIBLE_TYPES:
+            variants = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli:
+                variants["br"] = brotli.compress(content, quality=11)
+
+            # Only keep variants that are actually worth sending
+            asset.encoded = {encoding: data for encoding, data in variants.items() if len(data) < len(content)}
+
+        self.assets[path] = asset
+        self.fingerprints[asset.fingerprinted_name] = path
+
+    def url(self, path: str) -> str:
+        """
+        Returns the fingerprinted URL of a static file. Meant to be used from templates
+
+        Parameters
+        ----------
+        path (str): Path of the file relative to the static directory
+
+        Returns
+        ----------
+        (str): The URL of the file
+        """
+
+        path = path.lstrip("/")
+        return f"{self.mount_path}/{self.assets[path].fingerprinted_name}"
+
+    def response(self, request: Request, path: str) -> Response:
+        """
+        Builds the response for a static file
+
+        Parameters
+        ----------
+        request (Request): The incoming request
+        path (str): Requested path, fingerprinted or not
+
+        Returns
+        ----------
+        (Response): The file, a 304 if the client already has it or a 404
+        """
+
+        if path in self.fingerprints:
+            asset = self.assets[self.fingerprints[path]]
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        elif path in self.assets:
+            asset = self.assets[path]
+            cache_control = REVALIDATE_CACHE_CONTROL
+        else:
+            return Response(status_code=404)
+
+        headers = {"Cache-Control": cache_control}
+        if asset.encoded:
+            headers["Vary"] = "Accept-Encoding"
+
+        # Pick the smallest representation the client accepts
+        content, etag = asset.content, asset.etag
+        accepted = {
+            encoding.split(";")[0].strip() for encoding in request.headers.get("accept-encoding", "").split(",")
+        }
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in asset.encoded:
+                content, etag = asset.encoded[encoding], f'{asset.etag[:-1]}-{encoding}"'
+                headers["Content-Encoding"] = encoding
+                break
+        headers["ETag"] = etag
+
+        if etag in request.headers.get("if-none-match", ""):
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+
+        return Response(content, media_type=asset.media_type, headers=headers)